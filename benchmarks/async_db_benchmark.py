@@ -0,0 +1,176 @@
+"""
+Benchmark per-worker concurrency: blocking Session calls inside async routes
+against AsyncSession.
+
+Runs two small in-process FastAPI apps on one event loop, like a single
+uvicorn worker. Each app serves a database-heavy route (a lead count with an
+ILIKE scan) and a trivial /ping route. While clients hammer the database
+route, the benchmark measures ping latency and overall throughput. With
+blocking sessions every ping waits behind the queries; with AsyncSession it
+does not.
+
+    python benchmarks/async_db_benchmark.py --rows 200000 --concurrency 16
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from models import Base, Lead
+from benchmarks.search_benchmark import populate
+
+logger = logging.getLogger(__name__)
+
+
+def count_statement(term: str):
+    pattern = f"%{term}%"
+    return select(func.count(Lead.id)).where(
+        or_(Lead.first_name.ilike(pattern), Lead.last_name.ilike(pattern), Lead.email.ilike(pattern))
+    )
+
+
+def build_sync_app(url: str) -> FastAPI:
+    """The old pattern: async def routes that run blocking Session queries."""
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    SessionLocal = sessionmaker(bind=engine)
+    app = FastAPI()
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/count")
+    async def count(term: str, db: Session = Depends(get_db)):
+        return {"count": db.scalar(count_statement(term))}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.state.engine = engine
+    return app
+
+
+def build_async_app(url: str) -> FastAPI:
+    """The new pattern: AsyncSession, as served by utils.database.get_async_db."""
+    if url.startswith("sqlite:"):
+        url = url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    elif url.startswith("postgresql:"):
+        url = url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    engine = create_async_engine(url)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    app = FastAPI()
+
+    async def get_db():
+        async with SessionLocal() as db:
+            yield db
+
+    @app.get("/count")
+    async def count(term: str, db: AsyncSession = Depends(get_db)):
+        return {"count": await db.scalar(count_statement(term))}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.state.engine = engine
+    return app
+
+
+async def run_load(app: FastAPI, concurrency: int, duration: float) -> dict:
+    """Drive /count with `concurrency` clients while one client measures /ping."""
+    transport = httpx.ASGITransport(app=app)
+    queries = 0
+    ping_latencies = []
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def query_client(worker: int):
+            nonlocal queries
+            terms = ["smith", "gonz", "mary", "lawfirm"]
+            i = worker
+            while time.perf_counter() < deadline:
+                response = await client.get("/count", params={"term": terms[i % len(terms)]})
+                response.raise_for_status()
+                queries += 1
+                i += 1
+
+        async def ping_client():
+            interval = 0.005
+            while time.perf_counter() < deadline:
+                # Latency counts from when the ping was due, so time spent waiting
+                # for a blocked event loop is included
+                due = time.perf_counter() + interval
+                await asyncio.sleep(interval)
+                (await client.get("/ping")).raise_for_status()
+                ping_latencies.append(time.perf_counter() - due)
+
+        started = time.perf_counter()
+        await asyncio.gather(ping_client(), *(query_client(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ping_latencies.sort()
+    return {
+        "queries_per_second": queries / elapsed,
+        "pings": len(ping_latencies),
+        "ping_p50_ms": statistics.median(ping_latencies) * 1000 if ping_latencies else 0.0,
+        "ping_p99_ms": ping_latencies[int(len(ping_latencies) * 0.99) - 1] * 1000 if ping_latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: temporary SQLite file)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per variant")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    temp_dir = None
+    url = args.database_url
+    if not url:
+        temp_dir = tempfile.mkdtemp()
+        url = f"sqlite:///{os.path.join(temp_dir, 'async_db_benchmark.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    populate(engine, args.rows)
+    engine.dispose()
+    print(f"Inserted {args.rows} leads in {time.perf_counter() - started:.1f}s")
+
+    print(f"\n{'variant':<16}{'queries/s':>12}{'pings':>8}{'ping p50 ms':>14}{'ping p99 ms':>14}")
+    for name, build in (("sync Session", build_sync_app), ("AsyncSession", build_async_app)):
+        app = build(url)
+        result = asyncio.run(run_load(app, args.concurrency, args.duration))
+        print(f"{name:<16}{result['queries_per_second']:>12.1f}{result['pings']:>8}"
+              f"{result['ping_p50_ms']:>14.1f}{result['ping_p99_ms']:>14.1f}")
+        if isinstance(app.state.engine, AsyncEngine):
+            asyncio.run(app.state.engine.dispose())
+        else:
+            app.state.engine.dispose()
+
+    if temp_dir:
+        os.remove(os.path.join(temp_dir, "async_db_benchmark.db"))
+        os.rmdir(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark peak memory of attorney notification sends by attachment handling.
+
+Stores one resume in a temporary local store and sends it repeatedly to an
+in-process SMTP sink that discards what it receives. Each variant runs in a
+fresh subprocess so its peak RSS is its own:
+
+- legacy: the whole file read, attached with MIMEApplication and the message
+  serialized with as_string() (the behaviour before attachment policies)
+- attach: the encoded body built once, cached and spliced into the streamed message
+- stream: the body encoded from storage chunk by chunk while it is sent
+
+Reports the peak RSS growth over the sends and the Python heap peak of one
+send (tracemalloc).
+
+    python benchmarks/email_attachment_benchmark.py --size-mb 5 --sends 5
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import socketserver
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = ("legacy", "attach", "stream")
+RESUME_KEY = "be/nc/benchmark.pdf"
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages and throw them away."""
+
+    def handle(self):
+        reply = lambda line: self.wfile.write(line.encode() + b"\r\n")
+        reply("220 sink")
+        in_data = False
+        for line in self.rfile:
+            if in_data:
+                if line == b".\r\n":
+                    in_data = False
+                    reply("250 discarded")
+                continue
+            command = line.strip().upper()
+            if command.startswith(b"EHLO"):
+                reply("250-sink")
+                reply("250 8BITMIME")
+            elif command == b"DATA":
+                in_data = True
+                reply("354 go ahead")
+            elif command == b"QUIT":
+                reply("221 bye")
+                return
+            else:
+                reply("250 ok")
+
+
+def peak_rss_kb() -> int:
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_variant(variant: str, upload_dir: str, sends: int) -> dict:
+    """Runs in the child process."""
+    import tracemalloc
+    os.environ["UPLOAD_DIR"] = upload_dir
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    from services.email_attachments import ResumeAttachment, attachment_cache, iter_base64_lines, with_attachment
+    from services.resume_store import iter_resume, read_resume
+    from services.smtp_pool import SMTPConnectionPool
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SinkHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    pool = SMTPConnectionPool("127.0.0.1", server.server_address[1], starttls=False)
+    size = os.path.getsize(os.path.join(upload_dir, RESUME_KEY))
+
+    def send_once():
+        message = MIMEMultipart()
+        message["Subject"] = "New lead submitted"
+        message.attach(MIMEText("<p>A new lead has been submitted.</p>", "html"))
+        if variant == "legacy":
+            part = MIMEApplication(read_resume(RESUME_KEY), Name="resume.pdf")
+            part["Content-Disposition"] = 'attachment; filename="resume.pdf"'
+            message.attach(part)
+            outgoing = message.as_string()
+        else:
+            attachment = ResumeAttachment("resume.pdf", "application/pdf", size, RESUME_KEY)
+            if variant == "attach":
+                attachment.encoded = attachment_cache.get(RESUME_KEY)
+                if attachment.encoded is None:
+                    attachment.encoded = b"".join(iter_base64_lines(iter_resume(RESUME_KEY)))
+                    attachment_cache.put(RESUME_KEY, attachment.encoded)
+            outgoing = with_attachment(message, attachment)
+        pool.send("bench@example.com", "attorney@example.com", outgoing)
+
+    # Connect and import everything before measuring
+    pool.send("bench@example.com", "attorney@example.com", "Subject: warm-up\r\n\r\nwarm-up")
+    attachment_cache.max_bytes = 4 * size
+    before = peak_rss_kb()
+    started = time.perf_counter()
+    for _ in range(sends):
+        send_once()
+    elapsed = time.perf_counter() - started
+    rss_growth = peak_rss_kb() - before
+
+    tracemalloc.start()
+    send_once()
+    heap_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    pool.close_all()
+    return {
+        "ms_per_send": elapsed / sends * 1000,
+        "peak_rss_growth_kb": rss_growth,
+        "heap_peak_kb": heap_peak // 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Resume size")
+    parser.add_argument("--sends", type=int, default=5, help="Sends per variant")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--upload-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.upload_dir, args.sends)))
+        return
+
+    with tempfile.TemporaryDirectory() as upload_dir:
+        path = os.path.join(upload_dir, RESUME_KEY)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as file:
+            file.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+
+        print(f"{'variant':<10}{'ms/send':>10}{'peak RSS growth MB':>20}{'heap peak MB':>14}")
+        for variant in VARIANTS:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--variant", variant,
+                 "--upload-dir", upload_dir, "--sends", str(args.sends)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{variant:<10}{result['ms_per_send']:>10.1f}{result['peak_rss_growth_kb'] / 1024:>20.1f}"
+                  f"{result['heap_peak_kb'] / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
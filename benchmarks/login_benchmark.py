@@ -0,0 +1,121 @@
+"""
+Benchmark logins against unrelated traffic on one worker.
+
+Runs an in-process FastAPI app on a single event loop, like one uvicorn
+worker, with three routes: a login that verifies bcrypt inline (the old
+behaviour), a login that verifies on the password hashing pool, and a
+trivial /ping. While clients log in concurrently, the benchmark measures
+login throughput and the latency of /ping requests.
+
+    python benchmarks/login_benchmark.py --concurrency 8 --rounds 12
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from passlib.context import CryptContext
+
+from utils.password_hashing import PasswordHashPool
+
+logger = logging.getLogger(__name__)
+
+
+def build_app(rounds: int, workers: int, queue_limit: int) -> FastAPI:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    stored_hash = context.hash("benchmark-password")
+    pool = PasswordHashPool(workers, queue_limit)
+    app = FastAPI()
+
+    @app.post("/login/inline")
+    async def login_inline():
+        if not context.verify("benchmark-password", stored_hash):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.post("/login/pooled")
+    async def login_pooled():
+        if not await pool.run(context.verify, "benchmark-password", stored_hash):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.state.pool = pool
+    return app
+
+
+async def run_load(app: FastAPI, path: str, concurrency: int, duration: float) -> dict:
+    """Log in with `concurrency` clients while one client measures /ping."""
+    transport = httpx.ASGITransport(app=app)
+    logins = 0
+    rejected = 0
+    ping_latencies = []
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login_client():
+            nonlocal logins, rejected
+            while time.perf_counter() < deadline:
+                response = await client.post(path)
+                if response.status_code == 503:
+                    rejected += 1
+                    await asyncio.sleep(0.05)
+                    continue
+                response.raise_for_status()
+                logins += 1
+
+        async def ping_client():
+            interval = 0.005
+            while time.perf_counter() < deadline:
+                # Latency counts from when the ping was due, so time spent waiting
+                # for a blocked event loop is included
+                due = time.perf_counter() + interval
+                await asyncio.sleep(interval)
+                (await client.get("/ping")).raise_for_status()
+                ping_latencies.append(time.perf_counter() - due)
+
+        started = time.perf_counter()
+        await asyncio.gather(ping_client(), *(login_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ping_latencies.sort()
+    return {
+        "logins_per_second": logins / elapsed,
+        "rejected": rejected,
+        "ping_p50_ms": statistics.median(ping_latencies) * 1000 if ping_latencies else 0.0,
+        "ping_p99_ms": ping_latencies[int(len(ping_latencies) * 0.99) - 1] * 1000 if ping_latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent login clients")
+    parser.add_argument("--workers", type=int, default=2, help="Password hashing pool threads")
+    parser.add_argument("--queue-limit", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per variant")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    app = build_app(args.rounds, args.workers, args.queue_limit)
+
+    print(f"{'variant':<16}{'logins/s':>10}{'rejected':>10}{'ping p50 ms':>14}{'ping p99 ms':>14}")
+    for name, path in (("inline", "/login/inline"), ("hashing pool", "/login/pooled")):
+        result = asyncio.run(run_load(app, path, args.concurrency, args.duration))
+        print(f"{name:<16}{result['logins_per_second']:>10.1f}{result['rejected']:>10}"
+              f"{result['ping_p50_ms']:>14.1f}{result['ping_p99_ms']:>14.1f}")
+    app.state.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark lead search: the legacy ILIKE scan against the full-text index.
+
+Builds a throwaway database with synthetic leads and times both search paths
+for a handful of terms. Defaults to 1M rows in a temporary SQLite file:
+
+    python benchmarks/search_benchmark.py --rows 1000000
+    python benchmarks/search_benchmark.py --database-url postgresql://... --rows 1000000
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, or_
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Lead
+from utils.search import apply_search, ensure_search_index
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = ["james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda",
+               "david", "elizabeth", "william", "barbara", "richard", "susan", "joseph", "jessica"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis",
+              "rodriguez", "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson"]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "example.org", "lawfirm.com"]
+
+
+def populate(engine, rows: int, batch_size: int = 10000):
+    """Insert synthetic leads in batches."""
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, rows)):
+                first = rng.choice(FIRST_NAMES)
+                last = rng.choice(LAST_NAMES)
+                batch.append({
+                    "first_name": first.title(),
+                    "last_name": last.title(),
+                    "email": f"{first}.{last}{i}@{rng.choice(DOMAINS)}",
+                    "created_at": start + timedelta(seconds=i * 30),
+                    "updated_at": start + timedelta(seconds=i * 30),
+                })
+            conn.execute(insert(Lead), batch)
+
+
+def ilike_query(db, search: str):
+    term = f"%{search}%"
+    return db.query(Lead).filter(or_(Lead.first_name.ilike(term), Lead.last_name.ilike(term), Lead.email.ilike(term)))
+
+
+def time_query(build, repeat: int):
+    """Run a count plus a first page for the query, returning the best wall time in ms."""
+    best = float("inf")
+    matches = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query = build()
+        matches = query.count()
+        query.order_by(Lead.created_at.desc()).limit(25).all()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: temporary SQLite file)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--terms", nargs="+", default=["jennifer", "gonz", "rodriguez12", "mary smith", "zzz"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    temp_dir = None
+    url = args.database_url
+    if not url:
+        temp_dir = tempfile.mkdtemp()
+        url = f"sqlite:///{os.path.join(temp_dir, 'search_benchmark.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    populate(engine, args.rows)
+    print(f"Inserted {args.rows} leads in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    ensure_search_index(engine)
+    print(f"Built search index in {time.perf_counter() - started:.1f}s")
+
+    db = sessionmaker(bind=engine)()
+    print(f"\n{'term':<16}{'ilike ms':>12}{'matches':>10}{'index ms':>12}{'matches':>10}{'speedup':>10}")
+    for term in args.terms:
+        ilike_ms, ilike_matches = time_query(lambda: ilike_query(db, term), args.repeat)
+        index_ms, index_matches = time_query(lambda: apply_search(db.query(Lead), engine.dialect.name, term, ranked=False)[0], args.repeat)
+        print(f"{term:<16}{ilike_ms:>12.1f}{ilike_matches:>10}{index_ms:>12.1f}{index_matches:>10}{ilike_ms / index_ms:>9.1f}x")
+    db.close()
+
+    if temp_dir:
+        engine.dispose()
+        os.remove(os.path.join(temp_dir, "search_benchmark.db"))
+        os.rmdir(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,46 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "${DATABASE_URL}")
+    DATABASE_POOL_SIZE: int = 10  # Async connections per worker (PostgreSQL)
+    DATABASE_MAX_OVERFLOW: int = 10
 
     # Authentication
     SECRET_KEY: str = os.getenv("SECRET_KEY",
                                 "${SECRET_KEY}")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_USER_CACHE_TTL: float = 60.0  # Seconds a looked-up user's identity and role are reused
+    AUTH_USER_CACHE_SIZE: int = 1024  # Users kept per worker, 0 to disable
+    TOKEN_CACHE_SIZE: int = 4096  # Verified tokens kept per worker until they expire, 0 to disable
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 1.0  # How often a worker picks up tokens revoked (logged out) by other workers
+    # Trust the uid/role claims in tokens instead of looking the user up. Role changes
+    # then only take effect once the user's current token expires.
+    AUTH_TRUST_TOKEN_ROLE: bool = False
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # Cost factor; existing hashes are rehashed on the next login after a change
+    PASSWORD_HASH_WORKERS: int = 2  # Threads per worker running bcrypt
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32  # Queued hashes beyond the workers before logins get a 503
+
+    # Rate limiting of the public endpoints (token buckets: burst, then a steady rate per minute)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared, needs redis)
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_MAX_KEYS: int = 100_000  # Buckets kept per worker by the memory backend
+    SUBMIT_RATE_PER_IP: float = 10.0  # Lead submissions per minute per client IP, 0 to disable
+    SUBMIT_BURST_PER_IP: int = 5
+    SUBMIT_RATE_PER_EMAIL: float = 2.0  # Lead submissions per minute per email address
+    SUBMIT_BURST_PER_EMAIL: int = 3
+    LOGIN_RATE_PER_IP: float = 30.0  # Login attempts per minute per client IP
+    LOGIN_BURST_PER_IP: int = 10
+    LOGIN_RATE_PER_EMAIL: float = 5.0  # Login attempts per minute per account email
+    LOGIN_BURST_PER_EMAIL: int = 5
+    MAX_INFLIGHT_UPLOADS: int = 16  # Lead submissions processed at once per worker before 503s, 0 for no cap
 
     # Email settings
     DEBUG_EMAIL: str = os.getenv("DEBUG_EMAIL", "true")
@@ -20,6 +50,36 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "${SMTP_PASSWORD}")
     EMAIL_FROM: str = os.getenv("EMAIL_FROM", "${EMAIL_FROM}")
     ATTORNEY_EMAIL: str = os.getenv("ATTORNEY_EMAIL", "${ATTORNEY_EMAIL}")
+    APP_BASE_URL: str = os.getenv("APP_BASE_URL", "http://localhost:5000")  # Public URL for links in emails
+
+    # Resume attachments on attorney notifications
+    # "attach": attach resumes up to EMAIL_ATTACHMENT_MAX_BYTES, link to larger ones
+    # "link": always send a signed download link instead of the file
+    # "stream": always attach, base64-encoded while the message is sent
+    EMAIL_ATTACHMENT_POLICY: str = "attach"
+    EMAIL_ATTACHMENT_MAX_BYTES: int = 2 * 1024 * 1024
+    EMAIL_ATTACHMENT_CACHE_BYTES: int = 16 * 1024 * 1024  # Encoded attachments kept per worker, 0 to disable
+    RESUME_LINK_TTL: int = 7 * 24 * 3600  # Seconds a signed resume link stays valid
+
+    # SMTP connection pool
+    SMTP_POOL_SIZE: int = 4  # Maximum concurrent SMTP sessions per worker
+    SMTP_POOL_IDLE_TIMEOUT: float = 60.0  # Close pooled sessions idle for longer than this
+    SMTP_POOL_NOOP_AFTER: float = 10.0  # Health-check sessions with NOOP after this much idle time
+
+    # Email outbox delivery
+    OUTBOX_WORKERS: int = 2  # Delivery tasks started with the app, 0 to disable
+    OUTBOX_POLL_INTERVAL: float = 2.0  # Seconds between polls when the outbox is empty
+    OUTBOX_MAX_ATTEMPTS: int = 5  # Attempts before an entry is dead-lettered
+    OUTBOX_BACKOFF_BASE: float = 30.0  # Seconds, doubled after every failed attempt
+    OUTBOX_BACKOFF_MAX: float = 3600.0
+    OUTBOX_LEASE_SECONDS: int = 300  # How long a claimed entry is reserved for one worker
+
+    # Attorney notifications: "immediate" sends one email per lead, "digest" collects new
+    # leads and sends one email per DIGEST_WINDOW_SECONDS, or as soon as DIGEST_MAX_LEADS wait
+    ATTORNEY_NOTIFICATION_MODE: str = "immediate"
+    DIGEST_WINDOW_SECONDS: float = 900.0  # Longest a lead waits for its digest
+    DIGEST_MAX_LEADS: int = 50  # Leads per digest email
+    DIGEST_LIST_LEADS: bool = True  # List each lead with its resume link, otherwise only the count
 
     # Default attorney account
     DEFAULT_ATTORNEY_EMAIL: str = os.getenv("DEFAULT_ATTORNEY_EMAIL",
@@ -34,9 +94,48 @@ class Settings(BaseSettings):
     APP_DESCRIPTION: str = "A FastAPI-based lead management system with email notifications"
     APP_VERSION: str = "1.0.0"
 
+    # Lead list count cache
+    LEAD_COUNT_CACHE_TTL: float = 30.0  # Seconds an exact count is reused while no lead is written (bounds staleness of search totals after resume text extraction)
+    LEAD_COUNT_CACHE_SIZE: int = 256  # Distinct filter combinations kept per worker
+
     # File upload settings
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE: int = 5 * 1024 * 1024  # 5MB
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024  # 64KB per read/write
+    RESUME_COMPRESSION: bool = False  # zstd-compress resumes at rest (needs zstandard)
+    RESUME_COMPRESSION_LEVEL: int = 3
+
+    # Resume storage
+    STORAGE_BACKEND: str = "local"  # "local" (files under UPLOAD_DIR) or "s3"
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = "uploads/"  # Prepended to every object key
+    S3_ENDPOINT_URL: Optional[str] = None  # For MinIO or a local stand-in such as moto_server
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None  # Defaults to the standard AWS credential chain
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+
+    # Resume text extraction
+    RESUME_TEXT_WORKERS: int = 1  # Extraction processes started with the app, 0 to disable
+    RESUME_TEXT_TIMEOUT: float = 30.0  # Seconds per file before the extraction is abandoned
+    RESUME_TEXT_QUEUE_SIZE: int = 1000  # Queued resumes per worker; overflow is left for the backfill
+    RESUME_TEXT_MAX_CHARS: int = 100_000  # Extracted text kept per resume
+
+    # Bulk lead import
+    IMPORT_BATCH_SIZE: int = 1000  # Rows inserted and committed together
+    IMPORT_MAX_REPORTED_ERRORS: int = 100  # Row errors returned by the import endpoint
+    IMPORT_USE_COPY: bool = True  # Insert with COPY on PostgreSQL (asyncpg)
+
+    # Lead export
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched from the cursor and encoded at a time
+
+    # Duplicate lead detection, by normalized email (see utils/email_normalization.py)
+    DUPLICATE_LEAD_POLICY: str = "flag"  # "allow", "flag" (set duplicate_of), "merge" into the earlier lead, or "reject"
+    DUPLICATE_LEAD_WINDOW: int = 30 * 24 * 3600  # Seconds after a submission during which the same mailbox is a duplicate
+
+    # Idempotent lead submission (Idempotency-Key header)
+    IDEMPOTENCY_KEY_TTL: int = 24 * 3600  # Seconds a key and its response are kept for retries
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0  # How long a duplicate waits for the first request before a 409
+    IDEMPOTENCY_LOCK_TIMEOUT: float = 120.0  # Keys still in progress after this are taken over (request died)
 
     model_config = {"env_file": ".env"}
 
@@ -4,12 +4,14 @@ import smtplib
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
 from pathlib import Path
 from typing import Optional
 from jinja2 import Environment, FileSystemLoader
+from starlette.concurrency import run_in_threadpool
 
 from config import settings
+from services.smtp_pool import SMTPConnectionPool
+from services.email_attachments import ResumeAttachment, measure_send, prepare_resume_attachment, with_attachment
 from models import Lead
 
 # Get email settings directly from environment
@@ -31,12 +33,29 @@ logger.info(f"SMTP_USERNAME: {'*' * 8 if SMTP_USERNAME else 'not set'}")
 logger.info(f"EMAIL_FROM: {EMAIL_FROM}")
 logger.info(f"ATTORNEY_EMAIL: {ATTORNEY_EMAIL}")
 
+# Pooled SMTP sessions: TLS on the standard submission port
+smtp_pool = SMTPConnectionPool(
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    starttls=SMTP_PORT == 587,
+    max_size=settings.SMTP_POOL_SIZE,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+    noop_after=settings.SMTP_POOL_NOOP_AFTER,
+)
+
 # Set up Jinja2 environment for email templates
 templates_env = Environment(loader=FileSystemLoader('templates/email'))
 
-async def send_email(recipient_email: str, subject: str, html_content: str, attachment_path: Optional[str] = None):
+def _send_message(recipient_email: str, msg: MIMEMultipart, attachment: Optional[ResumeAttachment] = None):
+    """Blocking delivery; messages with an attachment are streamed to the server"""
+    with measure_send():
+        smtp_pool.send(EMAIL_FROM, recipient_email, with_attachment(msg, attachment) if attachment else msg)
+
+async def send_email(recipient_email: str, subject: str, html_content: str, attachment: Optional[ResumeAttachment] = None):
     """
-    Send an email with optional attachment
+    Send an email with an optional resume attachment
     """
     # Skip sending emails if SMTP settings are not configured
     if not all([SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD]):
@@ -59,54 +78,9 @@ async def send_email(recipient_email: str, subject: str, html_content: str, atta
         # Attach HTML content
         msg.attach(MIMEText(html_content, 'html'))
         
-        # Attach file if provided
-        if attachment_path and os.path.exists(attachment_path):
-            with open(attachment_path, 'rb') as file:
-                part = MIMEApplication(file.read(), Name=os.path.basename(attachment_path))
-                part['Content-Disposition'] = f'attachment; filename="{os.path.basename(attachment_path)}"'
-                msg.attach(part)
-        
-        # Connect to SMTP server with more verbosity and better error handling
-        logger.debug(f"Connecting to SMTP server: {SMTP_SERVER}:{SMTP_PORT}")
-        
-        # Set up SMTP connection with simplified settings
-        try:
-            # Create SMTP connection with simplest approach
-            logger.debug("Creating SMTP connection")
-            logger.debug(f"Using standard SMTP connection to {SMTP_SERVER}:{SMTP_PORT}")
-            
-            # Create server and enable debug output
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.set_debuglevel(1)
-            
-            # Say hello to the server
-            server.ehlo()
-            
-            # Check if we need to use TLS
-            if SMTP_PORT == 587:  # Standard TLS port
-                logger.debug("Starting TLS session")
-                server.starttls()
-                server.ehlo()  # Re-identify after TLS
-            
-            # Simple login - let SMTP library handle the details
-            if SMTP_USERNAME and SMTP_PASSWORD:
-                logger.debug(f"Logging in as {SMTP_USERNAME}")
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            else:
-                logger.error("Missing SMTP credentials - username or password is None")
-                raise ValueError("SMTP credentials not properly configured")
-            
-        except Exception as e:
-            logger.error(f"SMTP connection error: {str(e)}")
-            raise
-        
-        # Send email
-        logger.debug(f"Sending message to {recipient_email}")
-        server.send_message(msg)
-        
-        # Close connection
-        logger.debug("Closing SMTP connection")
-        server.quit()
+        # Send email over a pooled, already authenticated SMTP session
+        logger.debug(f"Sending message to {recipient_email} via {SMTP_SERVER}:{SMTP_PORT}")
+        await run_in_threadpool(_send_message, recipient_email, msg, attachment)
         
         logger.info(f"Email sent successfully to {recipient_email}")
         return True
@@ -154,27 +128,23 @@ async def send_attorney_notification(lead: Lead):
         # Get email template
         template = templates_env.get_template('attorney_notification.html')
         
+        # Attach the resume, or link to it, as the attachment policy decides
+        attachment, resume_link = await prepare_resume_attachment(lead)
+        
         # Render template with lead data
         html_content = template.render(
             lead=lead,
+            resume_link=resume_link,
             domain=os.environ.get('REPLIT_DOMAIN', 'localhost:5000'),
             current_year=datetime.now().year
         )
         
-        # Get resume path for attachment
-        resume_path = None
-        if lead.resume_path:
-            resume_path = os.path.join(settings.UPLOAD_DIR, lead.resume_path)
-            if not os.path.exists(resume_path):
-                logger.warning(f"Resume file not found at {resume_path}")
-                resume_path = None
-        
         # Send email with resume attachment
         await send_email(
             recipient_email=ATTORNEY_EMAIL,
             subject=f"New Lead Submission: {lead.first_name} {lead.last_name}",
             html_content=html_content,
-            attachment_path=resume_path
+            attachment=attachment
         )
         
         logger.info(f"Attorney notification sent to {ATTORNEY_EMAIL}")
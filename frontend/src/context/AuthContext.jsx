@@ -57,6 +57,8 @@ export const AuthProvider = ({ children }) => {
 
   // Logout function
   const logout = () => {
+    // Best effort: the local session ends even if the server can't be reached
+    authService.logout().catch(() => {});
     localStorage.removeItem('token');
     setCurrentUser(null);
   };
@@ -15,6 +15,9 @@ function Dashboard() {
   const [totalLeads, setTotalLeads] = useState(0);
   const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(10);
+  // Keyset cursors returned with the current page, and the one to use for the next fetch
+  const [cursors, setCursors] = useState({ next: null, prev: null });
+  const [cursor, setCursor] = useState(null);
   // Track the lead currently being updated (for disabling the update button)
   const [updatingLeadId, setUpdatingLeadId] = useState(null);
 
@@ -37,11 +40,16 @@ function Dashboard() {
         page,
         pageSize,
         searchQuery.trim() || null,
+        cursor,
       );
       // Update state with the returned data
       setLeads(data.leads);
       setFilteredLeads(data.leads);
-      setTotalLeads(data.total);
+      // Keep the previous total when the count was skipped
+      if (data.total !== null) {
+        setTotalLeads(data.total);
+      }
+      setCursors({ next: data.next_cursor, prev: data.prev_cursor });
       setError(null);
     } catch (err) {
       console.error("Error fetching leads:", err);
@@ -49,7 +57,7 @@ function Dashboard() {
     } finally {
       setLoading(false);
     }
-  }, [filterState, page, pageSize, searchQuery]);
+  }, [filterState, page, pageSize, searchQuery, cursor]);
 
   // Fetch leads whenever the filtering, pagination, or search criteria change.
   useEffect(() => {
@@ -58,20 +66,26 @@ function Dashboard() {
     }
   }, [fetchLeads, isAuthenticated, isAttorney]);
 
+  // Move to a page, seeking with a cursor when stepping to a neighbouring page
+  const goToPage = (newPage, newCursor = null) => {
+    setCursor(newCursor);
+    setPage(newPage);
+  };
+
   // Event handlers for filtering, searching, and pagination
   const handleFilterChange = (e) => {
     setFilterState(e.target.value);
-    setPage(1); // Reset to the first page when filter changes
+    goToPage(1); // Reset to the first page when filter changes
   };
 
   const handleSearchChange = (e) => {
     setSearchQuery(e.target.value.toLowerCase());
-    setPage(1); // Reset to the first page when search query changes
+    goToPage(1); // Reset to the first page when search query changes
   };
 
   const handlePageSizeChange = (e) => {
     setPageSize(Number(e.target.value));
-    setPage(1); // Reset to the first page when page size changes
+    goToPage(1); // Reset to the first page when page size changes
   };
 
   // Toggle lead status and refresh the list once updated
@@ -98,7 +112,7 @@ function Dashboard() {
   for (let i = 1; i <= totalPages; i++) {
     paginationButtons.push(
       <li key={i} className={`page-item ${page === i ? "active" : ""}`}>
-        <button className="page-link" onClick={() => setPage(i)}>
+        <button className="page-link" onClick={() => goToPage(i)}>
           {i}
         </button>
       </li>,
@@ -260,7 +274,7 @@ function Dashboard() {
                       >
                         <button
                           className="page-link"
-                          onClick={() => setPage(page - 1)}
+                          onClick={() => goToPage(page - 1, cursors.prev)}
                           disabled={page === 1}
                         >
                           Previous
@@ -274,7 +288,7 @@ function Dashboard() {
                       >
                         <button
                           className="page-link"
-                          onClick={() => setPage(page + 1)}
+                          onClick={() => goToPage(page + 1, cursors.next)}
                           disabled={page === totalPages}
                         >
                           Next
@@ -24,9 +24,14 @@ const getAuthHeader = () => {
 
 // Lead service
 export const leadService = {
-  // Get all leads with optional filtering
-  getAllLeads: async (state = null, page = 1, pageSize = 10, search = null) => {
-    let url = `${API_URL}/leads?skip=${(page - 1) * pageSize}&limit=${pageSize}`;
+  // Get all leads with optional filtering.
+  // Pass a next_cursor/prev_cursor from a previous response to seek to the
+  // neighbouring page instead of skipping rows by offset.
+  getAllLeads: async (state = null, page = 1, pageSize = 10, search = null, cursor = null) => {
+    // The total doesn't change when stepping between pages, so skip the count then
+    let url = cursor
+      ? `${API_URL}/leads?cursor=${encodeURIComponent(cursor)}&limit=${pageSize}&include_total=false`
+      : `${API_URL}/leads?skip=${(page - 1) * pageSize}&limit=${pageSize}`;
     
     // Add optional filters
     if (state) {
@@ -139,6 +144,16 @@ export const authService = {
     
     return handleResponse(response);
   },
+
+  // Logout: revoke the token on the server before it is discarded locally
+  logout: async () => {
+    const response = await fetch(`${API_URL}/auth/logout`, {
+      method: 'POST',
+      headers: getAuthHeader()
+    });
+
+    return handleResponse(response);
+  },
   
   // Get current user
   getCurrentUser: async () => {
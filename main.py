@@ -7,18 +7,23 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse, RedirectResponse, FileResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.middleware.base import BaseHTTPMiddleware
 
 import schemas
 import models
-from utils.database import engine, get_db
-from routers import leads, auth
+from utils.database import engine, get_async_db
+from routers import leads, auth, metrics
 from utils.auth import get_current_user, get_current_attorney, get_current_user_from_header_or_cookie, get_current_attorney_from_header_or_cookie
 from config import settings
 
 # Import email functions from our config module
 from services.email_config import DEBUG_EMAIL, get_sent_emails
+from services.email_outbox import start_outbox_workers, stop_outbox_workers
+from services.resume_text import start_resume_text_workers, stop_resume_text_workers
+from utils.search import detect_search_index
+from utils.password_hashing import password_hash_pool
+from utils.rate_limit import AdmissionMiddleware, LOGIN_PER_IP, SUBMIT_PER_IP
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -44,13 +49,14 @@ class ExceptionMiddleware(BaseHTTPMiddleware):
 models.Base.metadata.create_all(bind=engine)
 logger.info("Database tables created or verified")
 
-# Run database schema update for role column
+# Apply pending schema migrations
 try:
-    from update_db_schema import update_database_schema
-    update_database_schema()
-    logger.info("Database schema update for role column completed")
+    from migrations import run_migrations
+    run_migrations(engine)
+    detect_search_index(engine)
+    logger.info("Database migrations completed")
 
-    # Create default attorney user AFTER schema update
+    # Create default attorney user AFTER migrations
     from create_attorney import create_attorney_user
     from utils.database import SessionLocal
     db = SessionLocal()
@@ -71,7 +77,7 @@ try:
     finally:
         db.close()
 except Exception as e:
-    logger.error(f"Error updating database schema for role column: {str(e)}")
+    logger.error(f"Error applying database migrations: {str(e)}")
     # Continue execution to not break completely
 
 # Create the FastAPI app
@@ -80,6 +86,18 @@ app = FastAPI(title=settings.APP_NAME,
               version=settings.APP_VERSION)
 
 # Add middlewares
+# Rate limit and cap the public POST endpoints before their bodies are read
+# (added first so CORS headers still reach browsers on 429/503 responses)
+app.add_middleware(
+    AdmissionMiddleware,
+    ip_limits={
+        "/api/leads": SUBMIT_PER_IP,
+        "/api/leads/direct": SUBMIT_PER_IP,
+        "/api/auth/token": LOGIN_PER_IP,
+    },
+    upload_paths=["/api/leads", "/api/leads/direct"],
+    max_in_flight=settings.MAX_INFLIGHT_UPLOADS,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -106,6 +124,22 @@ if os.path.exists(frontend_dist_path):
 # Include routers with API prefix
 app.include_router(leads.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+
+
+# Start the email outbox delivery and resume text extraction workers with the app
+@app.on_event("startup")
+async def start_background_workers():
+    start_outbox_workers()
+    start_resume_text_workers()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await stop_outbox_workers()
+    await stop_resume_text_workers()
+    password_hash_pool.shutdown()
+
 
 # Add debugging endpoint for emails if in debug mode
 if DEBUG_EMAIL:
@@ -126,7 +160,7 @@ async def submit_lead_direct(request: Request,
                              last_name: str = Form(...),
                              email: str = Form(...),
                              resume: UploadFile = File(...),
-                             db: Session = Depends(get_db)):
+                             db: AsyncSession = Depends(get_async_db)):
     # Validate that resume is provided
     if not resume or not resume.filename:
         logger.warning("Resume file is required but was not provided")
@@ -141,7 +175,7 @@ async def submit_lead_direct(request: Request,
 # Add a direct route for token login
 @app.post("/api/auth/token", response_model=schemas.Token)
 async def login_direct(form_data: OAuth2PasswordRequestForm = Depends(),
-                       db: Session = Depends(get_db)):
+                       db: AsyncSession = Depends(get_async_db)):
     from routers.auth import login_for_access_token
     return await login_for_access_token(form_data, db)
 
@@ -0,0 +1 @@
+from migrations.runner import run_migrations, load_migrations, applied_revisions
@@ -0,0 +1,20 @@
+import logging
+import argparse
+
+from migrations import run_migrations, load_migrations, applied_revisions
+from utils.database import engine
+
+logging.basicConfig(level=logging.INFO)
+
+parser = argparse.ArgumentParser(description="Apply versioned database migrations")
+parser.add_argument("--list", action="store_true", help="Show migrations and whether they are applied")
+parser.add_argument("--target", help="Only apply migrations up to this revision")
+args = parser.parse_args()
+
+if args.list:
+    done = applied_revisions(engine)
+    for migration in load_migrations():
+        marker = "x" if migration.revision in done else " "
+        print(f"[{marker}] {migration.revision}  {migration.description}")
+else:
+    run_migrations(engine, target=args.target)
@@ -0,0 +1,115 @@
+"""
+Versioned schema migrations.
+
+Each module in migrations/versions defines:
+
+    revision       -- sortable revision id, e.g. "0003"
+    description    -- one line summary
+    transactional  -- False for DDL that can't run in a transaction
+                      (e.g. CREATE INDEX CONCURRENTLY on PostgreSQL)
+    upgrade(conn)  -- applies the change using the given connection
+
+Applied revisions are recorded in the schema_migrations table. Tables for new
+models are still created by Base.metadata.create_all; migrations cover the
+changes create_all can't make (new columns and indexes on existing tables).
+"""
+import pkgutil
+import logging
+import importlib
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for the PostgreSQL advisory lock
+MIGRATION_LOCK_ID = 7423901
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("revision", String, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+def load_migrations() -> List:
+    """Import every migration module, ordered by revision."""
+    from migrations import versions
+
+    modules = [
+        importlib.import_module(f"{versions.__name__}.{info.name}")
+        for info in pkgutil.iter_modules(versions.__path__)
+    ]
+    return sorted(modules, key=lambda module: module.revision)
+
+
+def applied_revisions(engine: Engine) -> set:
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.revision)).scalars())
+
+
+def _record(engine: Engine, migration):
+    try:
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(
+                revision=migration.revision,
+                description=migration.description,
+                applied_at=datetime.utcnow(),
+            ))
+    except IntegrityError:
+        # Another process applied the same (idempotent) revision concurrently
+        logger.info(f"Migration {migration.revision} was already recorded")
+
+
+def _apply(engine: Engine, migration):
+    # Only PostgreSQL has DDL that must run outside a transaction
+    if engine.dialect.name == "postgresql" and not getattr(migration, "transactional", True):
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            migration.upgrade(conn)
+    else:
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+
+
+def run_migrations(engine: Engine, target: Optional[str] = None) -> List[str]:
+    """Apply pending migrations up to `target` (all by default). Returns the applied revisions."""
+    lock = None
+    if engine.dialect.name == "postgresql":
+        # Serialize app workers that start at the same time
+        lock = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+    try:
+        done = applied_revisions(engine)
+        applied = []
+        for migration in load_migrations():
+            if target is not None and migration.revision > target:
+                break
+            if migration.revision in done:
+                continue
+            logger.info(f"Applying migration {migration.revision}: {migration.description}")
+            _apply(engine, migration)
+            _record(engine, migration)
+            applied.append(migration.revision)
+        if applied:
+            logger.info(f"Applied migrations: {', '.join(applied)}")
+        else:
+            logger.info("Database schema is up to date")
+        return applied
+    finally:
+        if lock is not None:
+            lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            lock.close()
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    """Check whether a column exists, for migrations that must be idempotent."""
+    return any(col["name"] == column for col in inspect(conn).get_columns(table))
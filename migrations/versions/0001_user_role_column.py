@@ -0,0 +1,15 @@
+"""Add the role column to users and mark existing attorneys."""
+from sqlalchemy import text
+
+from migrations.runner import has_column
+
+revision = "0001"
+description = "Add users.role and backfill it from is_attorney"
+transactional = True
+
+
+def upgrade(conn):
+    if has_column(conn, "users", "role"):
+        return
+    conn.execute(text("ALTER TABLE users ADD COLUMN role VARCHAR(50) DEFAULT 'USER' NOT NULL"))
+    conn.execute(text("UPDATE users SET role = 'ATTORNEY' WHERE is_attorney = 1"))
@@ -0,0 +1,15 @@
+"""Full-text search index for lead name/email search."""
+from migrations.runner import has_column
+from utils.search import create_search_index
+
+revision = "0002"
+description = "Create the lead search index (FTS5 on SQLite, tsvector/trigram GIN on PostgreSQL)"
+# Indexes are built concurrently on PostgreSQL
+transactional = False
+
+
+def upgrade(conn):
+    # The index now covers leads.resume_text; on databases created before that
+    # column existed, 0005 adds it and builds the index instead
+    if has_column(conn, "leads", "resume_text"):
+        create_search_index(conn)
@@ -0,0 +1,16 @@
+"""Composite indexes for the dashboard's lead list access patterns."""
+from utils.database import create_index
+
+revision = "0003"
+description = "Index leads by (state, created_at), (created_at, id) and reached_out_by"
+# Indexes are built concurrently on PostgreSQL
+transactional = False
+
+
+def upgrade(conn):
+    # State filter combined with the newest-first ordering
+    create_index(conn, "ix_leads_state_created_at", "leads", ["state", "created_at"])
+    # Keyset pagination over (created_at, id)
+    create_index(conn, "ix_leads_created_at_id", "leads", ["created_at", "id"])
+    # Leads reached out to by a given attorney
+    create_index(conn, "ix_leads_reached_out_by", "leads", ["reached_out_by"])
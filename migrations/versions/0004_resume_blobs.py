@@ -0,0 +1,10 @@
+"""Reference-counted table for the content-addressed resume store."""
+from models import ResumeBlob
+
+revision = "0004"
+description = "Create resume_blobs (run `python -m services.resume_store migrate` to move existing files)"
+transactional = True
+
+
+def upgrade(conn):
+    ResumeBlob.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,17 @@
+"""Extracted resume text, included in the lead search index."""
+from sqlalchemy import text
+
+from migrations.runner import has_column
+from utils.search import create_search_index
+
+revision = "0005"
+description = "Add leads.resume_text and index it for search (run `python -m services.resume_text` to backfill)"
+# Indexes are built concurrently on PostgreSQL
+transactional = False
+
+
+def upgrade(conn):
+    if not has_column(conn, "leads", "resume_text"):
+        conn.execute(text("ALTER TABLE leads ADD COLUMN resume_text TEXT"))
+    # Rebuilds the SQLite FTS5 table and replaces the PostgreSQL tsvector index
+    create_search_index(conn)
@@ -0,0 +1,10 @@
+"""Stored responses for lead submissions retried with the same Idempotency-Key."""
+from models import IdempotencyKey
+
+revision = "0006"
+description = "Create idempotency_keys"
+transactional = True
+
+
+def upgrade(conn):
+    IdempotencyKey.__table__.create(conn, checkfirst=True)
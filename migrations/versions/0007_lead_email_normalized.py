@@ -0,0 +1,19 @@
+"""Normalized email key for duplicate lead detection."""
+from sqlalchemy import text
+
+from migrations.runner import has_column
+from utils.database import create_index
+
+revision = "0007"
+description = "Add leads.email_normalized and leads.duplicate_of (run `python -m services.lead_duplicates` to backfill)"
+# Indexes are built concurrently on PostgreSQL
+transactional = False
+
+
+def upgrade(conn):
+    if not has_column(conn, "leads", "email_normalized"):
+        conn.execute(text("ALTER TABLE leads ADD COLUMN email_normalized VARCHAR"))
+    if not has_column(conn, "leads", "duplicate_of"):
+        conn.execute(text("ALTER TABLE leads ADD COLUMN duplicate_of INTEGER REFERENCES leads (id)"))
+    # Latest submission from a mailbox within the duplicate window
+    create_index(conn, "ix_leads_email_normalized_created_at", "leads", ["email_normalized", "created_at"])
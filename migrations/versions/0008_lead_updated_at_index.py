@@ -0,0 +1,12 @@
+"""Index for the lead list's conditional GET validators."""
+from utils.database import create_index
+
+revision = "0008"
+description = "Index leads by updated_at"
+# Indexes are built concurrently on PostgreSQL
+transactional = False
+
+
+def upgrade(conn):
+    # max(updated_at), the lead list's Last-Modified validator
+    create_index(conn, "ix_leads_updated_at", "leads", ["updated_at"])
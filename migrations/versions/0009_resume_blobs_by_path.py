@@ -0,0 +1,25 @@
+"""Key resume_blobs by storage path instead of content hash."""
+from sqlalchemy import inspect, text
+
+from models import ResumeBlob
+
+revision = "0009"
+description = "Key resume_blobs by path (run `python -m services.resume_store gc` to register untracked files)"
+transactional = True
+
+
+def upgrade(conn):
+    if inspect(conn).get_pk_constraint("resume_blobs")["constrained_columns"] == ["path"]:
+        # Created with the current model
+        return
+    # The same content stored under two keys (extension, ".zst") shared one row
+    # keyed by sha256, leaving the second file untracked. Rebuild the table; gc
+    # adds rows for files that were never recorded.
+    conn.execute(text("CREATE TABLE resume_blobs_0009 AS SELECT sha256, path, size, ref_count, created_at FROM resume_blobs"))
+    conn.execute(text("DROP TABLE resume_blobs"))
+    ResumeBlob.__table__.create(conn)
+    conn.execute(text(
+        "INSERT INTO resume_blobs (path, sha256, size, ref_count, created_at) "
+        "SELECT path, sha256, size, ref_count, created_at FROM resume_blobs_0009"
+    ))
+    conn.execute(text("DROP TABLE resume_blobs_0009"))
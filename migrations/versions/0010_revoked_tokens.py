@@ -0,0 +1,10 @@
+"""Access tokens revoked on logout, shared by every worker."""
+from models import RevokedToken
+
+revision = "0010"
+description = "Create revoked_tokens"
+transactional = True
+
+
+def upgrade(conn):
+    RevokedToken.__table__.create(conn, checkfirst=True)
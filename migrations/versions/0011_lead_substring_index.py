@@ -0,0 +1,12 @@
+"""Trigram index for substring search on SQLite."""
+from utils.search import create_search_index
+
+revision = "0011"
+description = "Create the FTS5 trigram index for lead substring search on SQLite"
+# Indexes are built concurrently on PostgreSQL
+transactional = False
+
+
+def upgrade(conn):
+    # Creates only what is missing: leads_trigram on SQLite, nothing new on PostgreSQL
+    create_search_index(conn)
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.orm import deferred, relationship
 
 from database import Base
 
@@ -13,6 +13,12 @@ class UserRole(str, enum.Enum):
     USER = "USER"
     ATTORNEY = "ATTORNEY"
 
+class OutboxStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -33,7 +39,14 @@ class Lead(Base):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     email = Column(String, nullable=False, index=True)
+    # utils.email_normalization.normalize_email(email), the key duplicates are found by
+    email_normalized = Column(String, nullable=True)
+    # The first lead from the same mailbox when this one was flagged as a duplicate
+    duplicate_of = Column(Integer, ForeignKey("leads.id"), nullable=True)
     resume_path = Column(String, nullable=True)  # Path to the resume file
+    # Text extracted from the resume for search; NULL until extracted, "" if nothing
+    # could be extracted. Deferred so list queries don't load it.
+    resume_text = deferred(Column(Text, nullable=True))
     state = Column(Enum(LeadState), default=LeadState.PENDING)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -45,3 +58,73 @@ class Lead(Base):
     
     # Relationship to the user who reached out
     attorney = relationship("User", foreign_keys=[reached_out_by])
+
+    # Kept in sync with migrations/versions/0003_lead_list_indexes.py, 0007 and 0008
+    __table_args__ = (
+        # State filter combined with the newest-first ordering
+        Index("ix_leads_state_created_at", "state", "created_at"),
+        # Keyset pagination over (created_at, id), newest first
+        Index("ix_leads_created_at_id", "created_at", "id"),
+        Index("ix_leads_reached_out_by", "reached_out_by"),
+        # Latest submission from a mailbox within the duplicate window
+        Index("ix_leads_email_normalized_created_at", "email_normalized", "created_at"),
+        # max(updated_at), the lead list's Last-Modified validator
+        Index("ix_leads_updated_at", "updated_at"),
+    )
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Which notification to send for the lead: "prospect" or "attorney"
+    kind = Column(String, nullable=False)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # When the entry is next eligible for delivery (also used as the claim lease)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+class ResumeBlob(Base):
+    """A stored resume file, shared by every lead that uploaded the same content."""
+    __tablename__ = "resume_blobs"
+
+    # Key in the storage backend, as stored in Lead.resume_path. The same content
+    # can be stored under several keys (extension, ".zst" suffix), one row each.
+    path = Column(String, primary_key=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    # Size of the original content
+    size = Column(Integer, nullable=False)
+    # Number of leads whose resume_path points at this file
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class IdempotencyKey(Base):
+    """The Idempotency-Key of a lead submission and the response replayed to its retries."""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    # SHA-256 of the submitted fields, so a key reused for another submission is rejected
+    request_hash = Column(String(64), nullable=False)
+    # NULL while the first request with the key is still being processed
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class RevokedToken(Base):
+    """An access token revoked before its expiry (logout), shared by all workers."""
+    __tablename__ = "revoked_tokens"
+
+    # SHA-256 of the token, see utils.token_cache.token_digest
+    digest = Column(String(64), primary_key=True)
+    # The token's exp claim; the row can be deleted after it
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Workers load the rows revoked since they last looked
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
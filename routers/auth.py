@@ -1,12 +1,15 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from utils.database import get_db
+from utils.database import get_async_db
 from models import User
 from schemas import Token, UserCreate, UserResponse
-from utils.auth import authenticate_user, create_access_token, get_password_hash, get_current_user
+from utils.auth import authenticate_user, create_access_token, hash_password, get_current_user, get_user_by_email, optional_oauth2_scheme, revoke_access_token
+from utils.user_cache import user_cache
+from utils.rate_limit import LOGIN_PER_EMAIL, get_rate_limiter
 from config import settings
 
 router = APIRouter(
@@ -16,9 +19,12 @@ router = APIRouter(
 @router.post("/auth/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    # Per-IP limits are applied by AdmissionMiddleware; this one stops guessing
+    # at a single account from many addresses
+    await get_rate_limiter().enforce(LOGIN_PER_EMAIL, form_data.username.strip().lower())
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,8 +33,15 @@ async def login_for_access_token(
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # uid/role/name let workers with AUTH_TRUST_TOKEN_ROLE skip the user lookup
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={
+            "sub": user.email,
+            "uid": user.id,
+            "role": user.role.value if user.role else None,
+            "name": user.full_name,
+        },
+        expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -36,10 +49,10 @@ async def login_for_access_token(
 @router.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await get_user_by_email(db, user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -47,7 +60,7 @@ async def register_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -56,11 +69,38 @@ async def register_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    user_cache.invalidate(db_user.email)
     
     return db_user
 
 @router.get("/auth/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def read_users_me(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Profile reads come from the database; the auth dependency may have used
+    # cached data or token claims, which don't carry every field
+    db_user = await get_user_by_email(db, current_user.email)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return db_user
+
+@router.post("/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    response: Response,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    cookie_token: Optional[str] = Cookie(None, alias="access_token"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Revoke whichever token was presented so it stops working before it expires,
+    # on every worker (within TOKEN_REVOCATION_SYNC_SECONDS on the others)
+    for presented in (token, cookie_token):
+        if presented:
+            await revoke_access_token(db, presented)
+    response.delete_cookie("access_token")
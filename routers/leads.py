@@ -1,22 +1,39 @@
 import os
-import shutil
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, Request
-from fastapi.responses import FileResponse, JSONResponse
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
-from uuid import uuid4
-
-from utils.database import get_db
+from typing import List, Literal, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from utils.database import get_async_db
+from utils.http_cache import accepts_encoding, etag_matches, http_date, if_range_matches, not_modified, parse_range, strong_etag
+from utils.compression import is_compressed_key
+from utils.pagination import apply_cursor, page_cursors
+from utils.lead_counts import count_leads, lead_count_cache, lead_data_version, lead_filter_key
+from utils.search import apply_search
+from utils.signed_urls import verify_resume_signature
+from utils.rate_limit import SUBMIT_PER_EMAIL, get_rate_limiter
+from utils.email_normalization import normalize_email
 from models import Lead, LeadState, User
-from schemas import LeadCreate, LeadResponse, LeadUpdate, LeadList
+from schemas import LeadCreate, LeadResponse, LeadUpdate, LeadList, LeadImportSummary, LeadBulkUpdate, LeadBulkUpdateResult
 from utils.auth import get_current_user, get_current_attorney, get_current_user_from_header_or_cookie, get_current_attorney_from_header_or_cookie
 from config import settings
 
-# Import email functions from our config module
-from services.email_config import send_prospect_notification, send_attorney_notification
+# Notifications are queued in the outbox and delivered in the background
+from services.email_outbox import enqueue_lead_notifications, notify_outbox
+from services.lead_import import detect_format, iter_import
+from services.lead_export import MEDIA_TYPES, iter_export
+from services.resume_store import add_reference, drop_reference, ensure_resume_stored, iter_resume, resume_filename, resume_media_type, resume_size, store_resume
+from services.resume_text import schedule_extraction
+from services.lead_duplicates import ALLOW, MERGE, REJECT, duplicate_policy, duplicate_stats, find_duplicate, merge_submission
+from services.storage import StorageBackend, get_storage
+from services import idempotency
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -33,16 +50,49 @@ async def submit_lead(
     last_name: str = Form(...),
     email: str = Form(...),
     resume: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     logger.info(f"Received lead submission for {first_name} {last_name} ({email})")
-    
+
+    # A retry with the same Idempotency-Key gets the first response back, and a
+    # concurrent duplicate waits for it, before anything is stored or queued
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key is not None:
+        idempotency_key = idempotency.scoped_key(idempotency.validate_key(idempotency_key), normalize_email(email))
+        # The resume's content, not just its name and size, identifies the submission
+        fingerprint = idempotency.request_fingerprint(
+            first_name, last_name, email, resume.filename if resume else None,
+            await idempotency.upload_digest(resume) if resume else None
+        )
+        stored = await idempotency.begin(idempotency_key, fingerprint)
+        if stored is not None:
+            logger.info(f"Replaying stored response for idempotency key {idempotency_key}")
+            return stored.to_response()
+
     try:
+        # Per-IP limits are applied by AdmissionMiddleware before the upload is read.
+        # Per-email limits use the normalized address, so "+tag" variants share one.
+        email_normalized = normalize_email(email)
+        await get_rate_limiter().enforce(SUBMIT_PER_EMAIL, email_normalized)
+
+        # Look for an earlier submission from the same mailbox (one index seek)
+        policy = duplicate_policy()
+        duplicate = await find_duplicate(db, email_normalized) if policy != ALLOW else None
+        if duplicate is not None and policy == REJECT:
+            duplicate_stats["rejected"] += 1
+            logger.info(f"Rejecting duplicate submission for {email} (lead ID {duplicate.id})")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A submission from this email address was already received"
+            )
+        merge = duplicate is not None and policy == MERGE
+
         # Create a new lead
         lead = Lead(
             first_name=first_name,
             last_name=last_name,
-            email=email
+            email=email,
+            email_normalized=email_normalized
         )
         
         # Ensure resume is provided
@@ -57,45 +107,18 @@ async def submit_lead(
         
         # Process the resume file
         try:
-            # Check file size
-            file_size = 0
-            content = await resume.read()
-            file_size = len(content)
-            await resume.seek(0)
-            
-            logger.debug(f"Resume file size: {file_size/1024:.2f} KB")
-            
-            # Check if file is empty
-            if file_size == 0:
-                logger.warning("Resume file is empty")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Resume file cannot be empty"
-                )
-                
-            if file_size > settings.MAX_UPLOAD_SIZE:
-                logger.warning(f"File size exceeds limit: {file_size/1024/1024:.2f}MB > {settings.MAX_UPLOAD_SIZE/1024/1024}MB")
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"File size exceeds the limit of {settings.MAX_UPLOAD_SIZE/1024/1024:.2f}MB"
-                )
-            
-            # Create uploads directory if it doesn't exist
-            os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-            
-            # Generate a unique filename
             file_extension = os.path.splitext(resume.filename)[1] if resume.filename else ".pdf"
-            unique_filename = f"{uuid4()}{file_extension}"
-            file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
             
-            # Save the file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(resume.file, buffer)
+            # Copy the spooled upload into the content-addressed store in chunks,
+            # enforcing the size limit as it goes. Identical resumes share one file.
+            upload = await store_resume(resume, file_extension)
             
-            logger.info(f"Resume saved successfully: {file_path}")
-            # Store just the filename instead of the full path
-            lead.resume_path = unique_filename
+            logger.info(f"Resume saved successfully: {upload.path} (deduplicated: {upload.deduplicated})")
+            # Store the path relative to the upload directory
+            lead.resume_path = upload.filename
             
+        except HTTPException:
+            raise
         except Exception as error:
             logger.error(f"Error processing resume: {str(error)}", exc_info=True)
             raise HTTPException(
@@ -103,100 +126,227 @@ async def submit_lead(
                 detail=f"Error processing resume: {str(error)}"
             )
         
-        # Save the lead to the database
+        # Save the lead, its resume reference and its notifications in a single transaction
+        status_code = status.HTTP_200_OK if merge else status.HTTP_201_CREATED
         try:
-            db.add(lead)
-            db.commit()
-            db.refresh(lead)
-            logger.info(f"Lead created successfully with ID: {lead.id}")
+            if merge:
+                # The earlier lead takes the new details; the attorney was already notified
+                previous_resume = merge_submission(duplicate, first_name, last_name, upload.filename)
+                lead = duplicate
+                if previous_resume is not None:
+                    await db.execute(add_reference(db.bind.dialect.name, upload.sha256, upload.filename, upload.size))
+                    await db.execute(drop_reference(previous_resume))
+                await db.flush()
+            else:
+                if duplicate is not None:
+                    lead.duplicate_of = duplicate.duplicate_of or duplicate.id
+                db.add(lead)
+                await db.execute(add_reference(db.bind.dialect.name, upload.sha256, upload.filename, upload.size))
+                await db.flush()
+                enqueue_lead_notifications(db, lead)
+            if idempotency_key is not None:
+                await db.refresh(lead)
+                body = LeadResponse.model_validate(lead).model_dump_json()
+                await db.execute(idempotency.complete_statement(idempotency_key, status_code, body))
+            await db.commit()
+            await db.refresh(lead)
+            lead_count_cache.invalidate()
+            if merge:
+                duplicate_stats["merged"] += 1
+                logger.info(f"Submission merged into lead ID: {lead.id}")
+            else:
+                if lead.duplicate_of is not None:
+                    duplicate_stats["flagged"] += 1
+                logger.info(f"Lead created successfully with ID: {lead.id} (duplicate of: {lead.duplicate_of})")
         except Exception as e:
             logger.error(f"Database error: {str(e)}", exc_info=True)
+            # The stored file may be shared with another lead, so it is left for
+            # `python -m services.resume_store gc` rather than removed here
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
                 detail=f"Error saving lead to database: {str(e)}"
             )
         
-        # Send email notifications asynchronously
+        # gc may have collected the shared file between deduplication and the commit
         try:
-            await send_prospect_notification(lead)
-            await send_attorney_notification(lead)
-            logger.info(f"Email notifications sent for lead ID: {lead.id}")
+            await ensure_resume_stored(resume, upload, file_extension)
         except Exception as e:
-            logger.error(f"Email notification error: {str(e)}", exc_info=True)
-            # Don't fail the request if email sending fails
-            # but log the error for troubleshooting
+            logger.error(f"Error checking stored resume {upload.filename}: {str(e)}", exc_info=True)
+
+        # Email notifications are delivered by the outbox workers
+        notify_outbox()
+        # Resume text for search is extracted in the background
+        schedule_extraction(lead.resume_path)
+        if idempotency_key is not None:
+            idempotency.finished(idempotency_key)
         
+        if merge:
+            return JSONResponse(status_code=status_code, content=jsonable_encoder(LeadResponse.model_validate(lead)))
         return lead
     except HTTPException:
+        if idempotency_key is not None:
+            await idempotency.release(idempotency_key)
         # Re-raise HTTP exceptions without modifying them
         raise
     except Exception as e:
+        if idempotency_key is not None:
+            await idempotency.release(idempotency_key)
         logger.error(f"Unexpected error in submit_lead: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
+    except BaseException:
+        # Cancelled, e.g. by a client disconnect: give the key up so the retry
+        # doesn't wait for IDEMPOTENCY_LOCK_TIMEOUT, even if cancelled again
+        if idempotency_key is not None:
+            await asyncio.shield(idempotency.release(idempotency_key))
+        raise
+
+# Protected endpoint for bulk imports (attorneys only)
+@router.post("/leads/import", response_model=LeadImportSummary)
+async def import_leads(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults to the file extension"),
+    batch_size: Optional[int] = Query(None, ge=1, le=50000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_attorney_from_header_or_cookie)
+):
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not determine the file format, pass format=csv or format=ndjson"
+        )
+    logger.info(f"Attorney ID {current_user.id} is importing leads from {file.filename} ({fmt})")
+
+    errors = []
+    errors_truncated = False
+    summary = None
+    try:
+        # The upload is already spooled to a temporary file, read it from there in batches
+        async for event in iter_import(db, file.file, fmt, batch_size):
+            if event["event"] == "error":
+                if len(errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append({"line": event["line"], "error": event["error"]})
+                else:
+                    errors_truncated = True
+            elif event["event"] == "progress":
+                logger.info(f"Import progress: {event['processed']} rows, {event['imported']} imported, {event['failed']} rejected")
+            else:
+                summary = event
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File is not valid UTF-8: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Error importing leads: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Import failed, batches committed before the error were kept: {str(e)}"
+        )
+
+    logger.info(f"Imported {summary['imported']} of {summary['processed']} leads in {summary['seconds']}s")
+    return {**summary, "errors": errors, "errors_truncated": errors_truncated}
+
+def _apply_lead_filters(query, dialect: str, state: Optional[LeadState] = None, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None, search: Optional[str] = None, ranked: bool = False):
+    """
+    Apply the dashboard's state, date range and search filters to a select(Lead) statement.
+
+    Returns (query, rank), where rank orders search results by relevance
+    (None unless `ranked`, or when there is no search or the database has no search index).
+    """
+    rank = None
+    # Filter by state if provided
+    if state:
+        logger.debug(f"Filtering leads by state: {state}")
+        query = query.filter(Lead.state == state)
+        
+    # Filter by date range if provided
+    if start_date:
+        try:
+            start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
+            logger.debug(f"Filtering leads from date: {start_datetime}")
+            query = query.filter(Lead.created_at >= start_datetime)
+        except ValueError as e:
+            logger.warning(f"Invalid start_date format: {start_date}. Error: {str(e)}")
+            # Continue without applying this filter
+            
+    if end_date:
+        try:
+            # Add one day to include the entire end date
+            end_datetime = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+            logger.debug(f"Filtering leads until date: {end_datetime}")
+            query = query.filter(Lead.created_at < end_datetime)
+        except ValueError as e:
+            logger.warning(f"Invalid end_date format: {end_date}. Error: {str(e)}")
+            # Continue without applying this filter
+            
+    # Search by name or email if provided, through the full-text index where available
+    if search:
+        logger.debug(f"Searching leads with term: {search}")
+        query, rank = apply_search(query, dialect, search, ranked)
+    return query, rank
 
 # Protected endpoint to get all leads (attorneys only)
 @router.get("/leads", response_model=LeadList)
-def get_all_leads(
+async def get_all_leads(
     request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    count_mode: Literal["exact", "estimate"] = "exact",
+    sort: Literal["recent", "relevance"] = "recent",
     state: Optional[LeadState] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_attorney_from_header_or_cookie)
 ):
-    logger.info(f"Getting leads for attorney ID: {current_user.id} | Params: skip={skip}, limit={limit}, state={state}, start_date={start_date}, end_date={end_date}, search={search}")
+    logger.info(f"Getting leads for attorney ID: {current_user.id} | Params: skip={skip}, limit={limit}, cursor={cursor}, state={state}, start_date={start_date}, end_date={end_date}, search={search}")
     
     try:
-        # Build query
-        query = db.query(Lead)
-        
-        # Filter by state if provided
-        if state:
-            logger.debug(f"Filtering leads by state: {state}")
-            query = query.filter(Lead.state == state)
-            
-        # Filter by date range if provided
-        if start_date:
-            try:
-                start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-                logger.debug(f"Filtering leads from date: {start_datetime}")
-                query = query.filter(Lead.created_at >= start_datetime)
-            except ValueError as e:
-                logger.warning(f"Invalid start_date format: {start_date}. Error: {str(e)}")
-                # Continue without applying this filter
-                
-        if end_date:
-            try:
-                # Add one day to include the entire end date
-                end_datetime = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
-                logger.debug(f"Filtering leads until date: {end_datetime}")
-                query = query.filter(Lead.created_at < end_datetime)
-            except ValueError as e:
-                logger.warning(f"Invalid end_date format: {end_date}. Error: {str(e)}")
-                # Continue without applying this filter
-                
-        # Search by name or email if provided
-        if search:
-            search_term = f"%{search}%"
-            logger.debug(f"Searching leads with term: {search}")
-            query = query.filter(
-                or_(
-                    Lead.first_name.ilike(search_term),
-                    Lead.last_name.ilike(search_term),
-                    Lead.email.ilike(search_term)
-                )
+        # Every write to leads moves max(updated_at) or max(id), two index lookups, so
+        # with the query parameters they validate the page before it is queried.
+        # Search results also change when resume text is extracted, which leaves
+        # updated_at alone, so searches get no validators. The same pair keys the
+        # count cache, so a write in any worker invalidates cached totals everywhere.
+        try:
+            version = await lead_data_version(db)
+        except Exception as e:
+            logger.error(f"Error reading lead list validators: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error retrieving leads: {str(e)}"
             )
+        if not search:
+            last_modified, last_id = version
+            etag = strong_etag("leads", last_modified, last_id, lead_filter_key(state, start_date, end_date),
+                               skip, limit, cursor, include_total, count_mode, sort)
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if last_modified is not None:
+                headers["Last-Modified"] = http_date(last_modified)
+            if not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since"),
+                            etag, last_modified):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            response.headers.update(headers)
+
+        # Build query
+        query, rank = _apply_lead_filters(select(Lead), db.bind.dialect.name, state, start_date, end_date, search,
+                                          ranked=sort == "relevance")
         
-        # Count total matching leads
+        # Count total matching leads, unless the caller doesn't need it
+        total, total_is_estimate = None, False
         try:
-            total = query.count()
-            logger.debug(f"Total matching leads: {total}")
+            if include_total:
+                key = lead_filter_key(state, start_date, end_date, search)
+                total, total_is_estimate = await count_leads(db, query, key, count_mode, version)
+                logger.debug(f"Total matching leads: {total} (estimate: {total_is_estimate})")
         except Exception as e:
             logger.error(f"Error counting leads: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -204,10 +354,26 @@ def get_all_leads(
                 detail=f"Error retrieving lead count: {str(e)}"
             )
         
-        # Apply pagination and get results
+        # Apply pagination and get results. A cursor seeks directly to the page
+        # through the (created_at, id) index; skip/limit is kept for compatibility.
         try:
-            leads = query.order_by(Lead.created_at.desc()).offset(skip).limit(limit).all()
+            if sort == "relevance" and rank is not None:
+                # Best matches first; relevance pages are offset-based only
+                page_query = query.order_by(rank, Lead.created_at.desc(), Lead.id.desc()).offset(skip).limit(limit)
+                direction = None
+            elif cursor:
+                page_query, direction = apply_cursor(query, cursor, limit)
+            else:
+                page_query = query.order_by(Lead.created_at.desc(), Lead.id.desc()).offset(skip).limit(limit + 1)
+                direction = None
+            rows = list((await db.scalars(page_query)).all())
+            if sort == "relevance" and rank is not None:
+                leads, next_cursor, prev_cursor = rows, None, None
+            else:
+                leads, next_cursor, prev_cursor = page_cursors(rows, limit, direction, has_previous=skip > 0)
             logger.info(f"Successfully retrieved {len(leads)} leads")
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching leads: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -215,7 +381,13 @@ def get_all_leads(
                 detail=f"Error retrieving leads: {str(e)}"
             )
         
-        return {"leads": leads, "total": total}
+        return {
+            "leads": leads,
+            "total": total,
+            "total_is_estimate": total_is_estimate,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
@@ -226,13 +398,138 @@ def get_all_leads(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+# Protected endpoint to export every matching lead (attorneys only). Declared
+# before the /leads/{lead_id} routes so "export" is not taken for an id.
+@router.get("/leads/export")
+async def export_leads(
+    format: Literal["csv", "ndjson"] = "csv",
+    state: Optional[LeadState] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    search: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_attorney_from_header_or_cookie)
+):
+    logger.info(f"Attorney ID {current_user.id} is exporting leads as {format} | Filters: state={state}, start_date={start_date}, end_date={end_date}, search={search}")
+
+    query, _ = _apply_lead_filters(select(Lead), db.bind.dialect.name, state, start_date, end_date, search)
+    query = query.order_by(Lead.created_at.desc(), Lead.id.desc())
+
+    filename = f"leads-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{format}"
+    return StreamingResponse(
+        iter_export(query, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Protected endpoint to update many leads at once (attorneys only). Declared
+# before /leads/{lead_id} so "bulk" is not taken for an id.
+@router.patch("/leads/bulk", response_model=LeadBulkUpdateResult)
+async def bulk_update_leads(
+    bulk_update: LeadBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_attorney_from_header_or_cookie)
+):
+    selection = f"{len(bulk_update.ids)} ids" if bulk_update.ids is not None else f"filter {bulk_update.filter.model_dump(exclude_none=True)}"
+    logger.info(f"Attorney ID {current_user.id} is bulk updating leads by {selection} | Update: {bulk_update.model_dump(include={'state', 'notes'}, exclude_none=True)}")
+
+    # Which leads to update
+    if bulk_update.ids is not None:
+        condition = Lead.id.in_(set(bulk_update.ids))
+    else:
+        lead_filter = bulk_update.filter
+        matching, _ = _apply_lead_filters(select(Lead.id), db.bind.dialect.name, lead_filter.state,
+                                          lead_filter.start_date, lead_filter.end_date, lead_filter.search)
+        condition = Lead.id.in_(matching)
+
+    # One UPDATE for every selected lead. CASE applies the single-lead rule per row:
+    # leads moving from PENDING to REACHED_OUT record the attorney and timestamp.
+    now = datetime.utcnow()
+    values = {"updated_at": now}
+    if bulk_update.state is not None:
+        values["state"] = bulk_update.state
+        if bulk_update.state == LeadState.REACHED_OUT:
+            moving = Lead.state == LeadState.PENDING
+            values["reached_out_by"] = case((moving, current_user.id), else_=Lead.reached_out_by)
+            values["reached_out_at"] = case((moving, now), else_=Lead.reached_out_at)
+    if bulk_update.notes is not None:
+        values["notes"] = bulk_update.notes
+
+    try:
+        result = await db.execute(
+            update(Lead).where(condition).values(**values)
+            .returning(Lead.id, Lead.reached_out_at)
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await db.commit()
+        lead_count_cache.invalidate()
+    except Exception as e:
+        logger.error(f"Error bulk updating leads: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating leads: {str(e)}"
+        )
+
+    outcomes = [
+        {"id": lead_id, "status": "updated", "reached_out": reached_out_at == now}
+        for lead_id, reached_out_at in sorted(rows)
+    ]
+    if bulk_update.ids is not None:
+        updated_ids = {row[0] for row in rows}
+        outcomes += [
+            {"id": lead_id, "status": "not_found"}
+            for lead_id in sorted(set(bulk_update.ids) - updated_ids)
+        ]
+    logger.info(f"Bulk update changed {len(rows)} leads")
+
+    return {
+        "updated": len(rows),
+        "not_found": len(outcomes) - len(rows),
+        "outcomes": outcomes,
+    }
+
+# Protected endpoint to get a single lead (attorneys only)
+@router.get("/leads/{lead_id}", response_model=LeadResponse)
+async def get_lead(
+    request: Request,
+    response: Response,
+    lead_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_attorney_from_header_or_cookie)
+):
+    try:
+        lead = await db.get(Lead, lead_id)
+    except Exception as e:
+        logger.error(f"Database error fetching lead ID {lead_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving lead: {str(e)}"
+        )
+    if not lead:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead not found"
+        )
+
+    # Every change to the lead's fields bumps updated_at
+    etag = strong_etag("lead", lead.id, lead.updated_at)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if lead.updated_at is not None:
+        headers["Last-Modified"] = http_date(lead.updated_at)
+    if not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since"),
+                    etag, lead.updated_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return lead
+
 # Protected endpoint to update lead state
 @router.patch("/leads/{lead_id}", response_model=LeadResponse)
-def update_lead(
+async def update_lead(
     request: Request,
     lead_id: int,
     lead_update: LeadUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_attorney_from_header_or_cookie)
 ):
     logger.info(f"Attorney ID {current_user.id} is updating lead ID {lead_id} | Update: {lead_update.dict(exclude_unset=True)}")
@@ -240,7 +537,7 @@ def update_lead(
     try:
         # Get the lead
         try:
-            lead = db.query(Lead).filter(Lead.id == lead_id).first()
+            lead = await db.get(Lead, lead_id)
             if not lead:
                 logger.warning(f"Lead ID {lead_id} not found during update attempt")
                 raise HTTPException(
@@ -283,8 +580,9 @@ def update_lead(
         
         # Save changes
         try:
-            db.commit()
-            db.refresh(lead)
+            await db.commit()
+            await db.refresh(lead)
+            lead_count_cache.invalidate()
             logger.info(f"Successfully updated lead ID {lead_id}: {', '.join(changes)}")
         except Exception as e:
             logger.error(f"Error saving lead updates: {str(e)}", exc_info=True)
@@ -303,3 +601,144 @@ def update_lead(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
+
+# Protected endpoint to download a lead's resume (attorneys only)
+@router.get("/leads/{lead_id}/resume")
+async def download_resume(
+    request: Request,
+    lead_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_attorney_from_header_or_cookie)
+):
+    lead = await db.get(Lead, lead_id)
+    if not lead or not lead.resume_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resume not found"
+        )
+    logger.info(f"Attorney ID {current_user.id} is downloading the resume of lead ID {lead_id}")
+    return await _serve_resume(request, db, lead)
+
+# Download through a signed link from an attorney notification email (no login needed)
+@router.get("/leads/{lead_id}/resume/signed")
+async def download_resume_signed(
+    request: Request,
+    lead_id: int,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    lead = await db.get(Lead, lead_id)
+    if not lead or not lead.resume_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resume not found"
+        )
+    if not verify_resume_signature(lead_id, lead.resume_path, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Download link is invalid or has expired"
+        )
+    logger.info(f"Resume of lead ID {lead_id} is being downloaded through a signed link")
+    return await _serve_resume(request, db, lead)
+
+
+async def _serve_resume(request: Request, db: AsyncSession, lead: Lead) -> Response:
+    """Respond with a lead's stored resume, honouring conditional and range requests."""
+    storage = get_storage()
+    try:
+        stored = await run_in_threadpool(storage.stat, lead.resume_path)
+    except ValueError:
+        # Key outside the storage root
+        stored = None
+    if stored is None:
+        logger.warning(f"Resume file for lead ID {lead.id} is missing: {lead.resume_path}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resume not found"
+        )
+
+    # Compressed resumes go out as stored to clients that accept zstd, and are
+    # decompressed for everyone else and for range requests
+    compressed = is_compressed_key(lead.resume_path)
+    passthrough = (
+        compressed
+        and not request.headers.get("range")
+        and accepts_encoding(request.headers.get("accept-encoding"), "zstd")
+    )
+
+    # Stored uploads are never rewritten in place, so key, size and mtime
+    # identify the exact bytes and make a strong validator (one per encoding)
+    etag = strong_etag(lead.resume_path, stored.size, stored.modified, *(["zstd"] if passthrough else []))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if compressed:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    filename = resume_filename(lead)
+    media_type = resume_media_type(lead.resume_path)
+
+    if passthrough:
+        return StreamingResponse(
+            storage.iter_range(lead.resume_path),
+            media_type=media_type,
+            headers={
+                **headers,
+                "Content-Encoding": "zstd",
+                "Content-Length": str(stored.size),
+                "Content-Disposition": _content_disposition(filename),
+            }
+        )
+
+    if compressed:
+        # Ranges and Content-Length refer to the original bytes
+        size = await resume_size(db, stored, storage)
+        return _stream_stored_file(request, storage, lead.resume_path, size, media_type, filename, headers)
+
+    local_path = storage.local_path(lead.resume_path)
+    if local_path:
+        # FileResponse handles Range/If-Range and hands the file to the server
+        # (http.response.pathsend) where supported, so no bytes pass through Python
+        return FileResponse(local_path, media_type=media_type, filename=filename, headers=headers)
+    return _stream_stored_file(request, storage, lead.resume_path, stored.size, media_type, filename, headers)
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _stream_stored_file(request: Request, storage: StorageBackend, key: str, size: int,
+                        media_type: str, filename: str, headers: dict) -> Response:
+    """
+    Stream a stored resume that can't be served by FileResponse (remote or
+    compressed), honouring a single byte range. `size` is the original size.
+    """
+    headers = {**headers, "Accept-Ranges": "bytes", "Content-Disposition": _content_disposition(filename)}
+    byte_range = None
+    if if_range_matches(request.headers.get("if-range"), headers["ETag"]):
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+
+    status_code = status.HTTP_200_OK
+    start, end = 0, size - 1
+    if byte_range:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    # StreamingResponse pulls the blocking iterator from the threadpool
+    return StreamingResponse(
+        iter_resume(key, start, end, storage),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
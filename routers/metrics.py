@@ -0,0 +1,55 @@
+import logging
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.database import get_async_db
+from utils.uploads import upload_stats
+from utils import compression
+from utils.lead_counts import lead_count_cache
+from utils.user_cache import user_cache
+from utils.token_cache import token_cache
+from utils.password_hashing import password_hash_pool
+from utils.rate_limit import get_rate_limiter
+from models import EmailOutbox, User
+from utils.auth import get_current_attorney_from_header_or_cookie
+from services.smtp_pool import get_smtp_pool
+from services import email_attachments, email_outbox, idempotency, lead_duplicates, resume_text
+import email_service as legacy_email_service
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+# Protected endpoint exposing per-worker performance counters (attorneys only)
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_metrics(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_attorney_from_header_or_cookie)
+):
+    result = await db.execute(
+        select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status)
+    )
+    outbox = dict(result.all())
+    return {
+        "uploads": upload_stats,
+        "compression": compression.stats(),
+        "lead_count_cache": lead_count_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "password_hashing": password_hash_pool.stats(),
+        "rate_limits": get_rate_limiter().stats(),
+        "smtp_pool": get_smtp_pool().stats(),
+        # Pool of the top-level email_service module
+        "legacy_smtp_pool": legacy_email_service.smtp_pool.stats(),
+        "email_attachments": email_attachments.stats(),
+        "resume_text": resume_text.stats(),
+        "outbox": {status.value: count for status, count in outbox.items()},
+        "attorney_digests": email_outbox.digest_stats,
+        "idempotency": idempotency.idempotency_stats,
+        "duplicate_leads": lead_duplicates.duplicate_stats,
+    }
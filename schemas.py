@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, field_validator
+from typing import Optional, List, Literal
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 from models import LeadState, UserRole
 
 # User schemas
@@ -48,6 +48,37 @@ class LeadUpdate(BaseModel):
     state: Optional[LeadState] = None
     notes: Optional[str] = None
 
+class LeadFilter(BaseModel):
+    # Same filters as the lead list endpoint
+    state: Optional[LeadState] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    search: Optional[str] = None
+
+class LeadBulkUpdate(LeadUpdate):
+    # Select leads either by id or by filter, not both
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    filter: Optional[LeadFilter] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        if self.state is None and self.notes is None:
+            raise ValueError("Provide state and/or notes to update")
+        return self
+
+class LeadBulkOutcome(BaseModel):
+    id: int
+    status: Literal["updated", "not_found"]
+    # True when this update moved the lead from PENDING to REACHED_OUT
+    reached_out: bool = False
+
+class LeadBulkUpdateResult(BaseModel):
+    updated: int
+    not_found: int
+    outcomes: List[LeadBulkOutcome]
+
 class LeadResponse(LeadBase):
     id: int
     state: LeadState
@@ -56,6 +87,8 @@ class LeadResponse(LeadBase):
     updated_at: datetime
     reached_out_at: Optional[datetime] = None
     reached_out_by: Optional[int] = None
+    # Set when the lead was flagged as a duplicate of an earlier submission
+    duplicate_of: Optional[int] = None
 
     model_config = {
         "from_attributes": True
@@ -63,4 +96,26 @@ class LeadResponse(LeadBase):
 
 class LeadList(BaseModel):
     leads: List[LeadResponse]
-    total: int
+    # None when the count was skipped with include_total=false
+    total: Optional[int] = None
+    # True when total is a planner estimate rather than an exact count
+    total_is_estimate: bool = False
+    # Opaque keyset cursors for the neighbouring pages, if any
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+# Bulk import schemas
+class LeadImportError(BaseModel):
+    line: int
+    error: str
+
+class LeadImportSummary(BaseModel):
+    processed: int
+    imported: int
+    failed: int
+    batches: int
+    seconds: float
+    rows_per_second: float
+    # The first IMPORT_MAX_REPORTED_ERRORS rejected rows
+    errors: List[LeadImportError] = []
+    errors_truncated: bool = False
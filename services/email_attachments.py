@@ -0,0 +1,283 @@
+"""
+Memory-bounded resume attachments for attorney notification emails.
+
+EMAIL_ATTACHMENT_POLICY decides how a lead's resume travels with the
+notification:
+
+- "attach": resumes up to EMAIL_ATTACHMENT_MAX_BYTES are attached, larger
+  ones are replaced by a signed download link
+- "link": always a signed download link
+- "stream": always attached; the base64 body is encoded from storage chunk
+  by chunk while the message is written to the SMTP socket
+
+Attached messages are never serialized as a whole: the headers and text
+parts are, and the attachment body is spliced in as the message is sent.
+Encoded bodies of resumes up to EMAIL_ATTACHMENT_MAX_BYTES are kept in a
+per-worker LRU cache keyed by their content-addressed storage key, so a
+resume sent again (retries, duplicate submissions) is not re-read and
+re-encoded.
+"""
+import io
+import uuid
+import base64
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.generator import BytesGenerator
+from email.message import Message
+from email.mime.base import MIMEBase
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from models import Lead
+from services.resume_store import iter_resume, resume_filename, resume_media_type, resume_size
+from services.storage import get_storage
+from utils.database import AsyncSessionLocal
+from utils.signed_urls import signed_resume_url
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+ATTACH = "attach"
+LINK = "link"
+STREAM = "stream"
+POLICIES = (ATTACH, LINK, STREAM)
+
+# Aggregate counters for this worker
+attachment_stats = {
+    "attached": 0,
+    "streamed": 0,
+    "linked": 0,
+    "missing": 0,
+    "sends": 0,
+    # Sends during which the worker's peak RSS grew, and the largest growth
+    "sends_raising_peak_rss": 0,
+    "max_send_rss_growth_kb": 0,
+}
+_stats_lock = threading.Lock()
+
+
+@dataclass
+class ResumeAttachment:
+    """A resume to attach, with its encoded body when it is already in memory."""
+    filename: str
+    content_type: str
+    size: int  # Original bytes
+    resume_path: str
+    encoded: Optional[bytes] = None  # CRLF-terminated base64 lines
+
+
+class EncodedAttachmentCache:
+    """Thread-safe LRU cache of encoded attachment bodies, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # storage key -> encoded body
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return encoded
+
+    def put(self, key: str, encoded: bytes):
+        if len(encoded) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = encoded
+            self._size += len(encoded)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+attachment_cache = EncodedAttachmentCache(settings.EMAIL_ATTACHMENT_CACHE_BYTES)
+
+
+def _count(name: str):
+    with _stats_lock:
+        attachment_stats[name] += 1
+
+
+def _encode(data: bytes) -> bytes:
+    # encodebytes emits 76-character lines from 57-byte groups (RFC 2045)
+    return base64.encodebytes(data).replace(b"\n", b"\r\n")
+
+
+def iter_base64_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Base64-encode a byte stream as CRLF-terminated lines, one output chunk per input chunk."""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        usable = len(pending) - len(pending) % 57
+        if usable:
+            yield _encode(pending[:usable])
+            pending = pending[usable:]
+    if pending:
+        yield _encode(pending)
+
+
+def _cacheable(size: int) -> bool:
+    return attachment_cache.max_bytes > 0 and size <= settings.EMAIL_ATTACHMENT_MAX_BYTES
+
+
+def _encode_resume(resume_path: str) -> bytes:
+    """Read and encode a small resume, through the cache. Blocking."""
+    encoded = b"".join(iter_base64_lines(iter_resume(resume_path)))
+    attachment_cache.put(resume_path, encoded)
+    return encoded
+
+
+async def prepare_resume_attachment(lead: Lead, policy: Optional[str] = None) -> Tuple[Optional[ResumeAttachment], Optional[str]]:
+    """
+    Apply the attachment policy to a lead's resume.
+
+    Returns (attachment, link): at most one of them is set, and neither when
+    the lead has no resume or its file is missing.
+    """
+    policy = policy or settings.EMAIL_ATTACHMENT_POLICY
+    if policy not in POLICIES:
+        raise RuntimeError(f"Unknown EMAIL_ATTACHMENT_POLICY: {policy}")
+    if not lead.resume_path:
+        return None, None
+
+    storage = get_storage()
+    try:
+        stored = await run_in_threadpool(storage.stat, lead.resume_path)
+    except Exception as e:
+        logger.warning(f"Could not look up resume {lead.resume_path}: {str(e)}")
+        stored = None
+    if stored is None:
+        logger.warning(f"Resume file not found: {lead.resume_path}")
+        _count("missing")
+        return None, None
+
+    async with AsyncSessionLocal() as db:
+        size = await resume_size(db, stored, storage)
+    if policy == LINK or (policy == ATTACH and size > settings.EMAIL_ATTACHMENT_MAX_BYTES):
+        _count("linked")
+        return None, signed_resume_url(lead.id, lead.resume_path)
+
+    attachment = ResumeAttachment(
+        filename=resume_filename(lead),
+        content_type=resume_media_type(lead.resume_path),
+        size=size,
+        resume_path=lead.resume_path,
+    )
+    if _cacheable(size):
+        attachment.encoded = attachment_cache.get(lead.resume_path)
+    if attachment.encoded is None and policy == ATTACH:
+        attachment.encoded = await run_in_threadpool(_encode_resume, lead.resume_path)
+    _count("attached" if attachment.encoded is not None else "streamed")
+    return attachment, None
+
+
+def _attachment_body(attachment: ResumeAttachment) -> Iterator[bytes]:
+    if attachment.encoded is not None:
+        yield attachment.encoded
+        return
+    # Streamed, and kept for the next send when it is small enough
+    cacheable = _cacheable(attachment.size)
+    encoded = []
+    for lines in iter_base64_lines(iter_resume(attachment.resume_path)):
+        if cacheable:
+            encoded.append(lines)
+        yield lines
+    if cacheable:
+        attachment_cache.put(attachment.resume_path, b"".join(encoded))
+
+
+def with_attachment(message: Message, attachment: ResumeAttachment) -> Callable[[], Iterator[bytes]]:
+    """
+    Attach a resume to a multipart message and return it in the streamed form
+    SMTPConnectionPool.send accepts. Blocking when iterated.
+    """
+    placeholder = f"resume-attachment-{uuid.uuid4().hex}"
+    maintype, subtype = attachment.content_type.split("/", 1)
+    # The filename comes from the lead's name. MIMEBase and add_header quote
+    # parameters and use RFC 2231 for non-ASCII names (like _content_disposition
+    # in routers/leads.py); an f-string header would be RFC 2047 encoded whole.
+    part = MIMEBase(maintype, subtype, name=attachment.filename)
+    part["Content-Transfer-Encoding"] = "base64"
+    part.add_header("Content-Disposition", "attachment", filename=attachment.filename)
+    part.set_payload(placeholder)
+    message.attach(part)
+
+    def chunks() -> Iterator[bytes]:
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, policy=message.policy.clone(linesep="\r\n")).flatten(message)
+        head, tail = buffer.getvalue().split(placeholder.encode(), 1)
+        yield head
+        yield from _attachment_body(attachment)
+        # The body ends with a line break already, drop the one after the placeholder
+        yield tail[2:] if tail.startswith(b"\r\n") else tail
+
+    return chunks
+
+
+def _peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    # Kilobytes on Linux (bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def measure_send():
+    """
+    Record how much a send raised the worker's peak RSS. Sends running
+    concurrently in other threads are attributed to whichever finishes first.
+    """
+    before = _peak_rss_kb()
+    try:
+        yield
+    finally:
+        growth = _peak_rss_kb() - before
+        with _stats_lock:
+            attachment_stats["sends"] += 1
+            if growth > 0:
+                attachment_stats["sends_raising_peak_rss"] += 1
+                attachment_stats["max_send_rss_growth_kb"] = max(attachment_stats["max_send_rss_growth_kb"], growth)
+
+
+def stats() -> dict:
+    with _stats_lock:
+        counters = dict(attachment_stats)
+    return {
+        **counters,
+        "policy": settings.EMAIL_ATTACHMENT_POLICY,
+        "peak_rss_kb": _peak_rss_kb(),
+        "cache": attachment_cache.stats(),
+    }
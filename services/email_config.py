@@ -33,7 +33,7 @@ if DEBUG_EMAIL:
     from services.email_debug import get_sent_emails
 else:
     logger.info("Using PRODUCTION email mode - emails will be sent via SMTP")
-    from services.email_service import send_prospect_notification, send_attorney_notification
+    from services.email_service import send_prospect_notification, send_attorney_notification, send_attorney_digest
 
     # Provide a dummy function for compatibility in production mode
     def get_sent_emails():
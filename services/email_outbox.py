@@ -0,0 +1,342 @@
+"""
+Durable email outbox.
+
+Notifications are written to the email_outbox table in the same transaction as
+the lead they belong to, and delivered later by a pool of background workers
+with retries, exponential backoff and dead-lettering. Workers run inside the
+app (see OUTBOX_WORKERS) or as a separate process:
+
+    python -m services.email_outbox
+
+With ATTORNEY_NOTIFICATION_MODE=digest, attorney notifications wait in the
+outbox as ATTORNEY_DIGEST entries and go out together: one email once the
+oldest has waited DIGEST_WINDOW_SECONDS, or as soon as DIGEST_MAX_LEADS
+have accumulated.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import EmailOutbox, Lead, OutboxStatus
+from utils.database import AsyncSessionLocal, SessionLocal
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PROSPECT_NOTIFICATION = "prospect"
+ATTORNEY_NOTIFICATION = "attorney"
+# Attorney notification waiting for the next digest
+ATTORNEY_DIGEST = "attorney_digest"
+
+# Aggregate digest counters for this worker
+digest_stats = {
+    "sent": 0,
+    "failed": 0,
+    "leads": 0,
+}
+
+# Wakes idle workers in this process as soon as new entries are committed
+_wakeup: Optional[asyncio.Event] = None
+_workers: List[asyncio.Task] = []
+
+
+def enqueue_lead_notifications(db: Union[Session, AsyncSession], lead: Lead):
+    """
+    Add the prospect and attorney notifications for a lead to the outbox.
+
+    The lead must already be flushed so it has an id. The entries are only
+    added to the session; they are committed together with the lead by the caller.
+    """
+    db.add(EmailOutbox(kind=PROSPECT_NOTIFICATION, lead_id=lead.id))
+    if settings.ATTORNEY_NOTIFICATION_MODE == "digest":
+        # Due when the digest window closes, or earlier once enough leads are waiting
+        db.add(EmailOutbox(
+            kind=ATTORNEY_DIGEST,
+            lead_id=lead.id,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=settings.DIGEST_WINDOW_SECONDS),
+        ))
+    else:
+        db.add(EmailOutbox(kind=ATTORNEY_NOTIFICATION, lead_id=lead.id))
+
+
+def notify_outbox():
+    """Wake the delivery workers after new entries have been committed."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts."""
+    delay = min(settings.OUTBOX_BACKOFF_BASE * (2 ** max(attempts - 1, 0)), settings.OUTBOX_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def _claim_next():
+    """
+    Claim the next due outbox entry for this worker.
+
+    Entries left in SENDING by a crashed worker become claimable again once
+    their lease expires. Returns (entry_id, kind, attempts, lead) or None.
+    """
+    async with AsyncSessionLocal() as db:
+        while True:
+            now = datetime.utcnow()
+            due = (EmailOutbox.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]),
+                   EmailOutbox.next_attempt_at <= now,
+                   EmailOutbox.kind != ATTORNEY_DIGEST)
+            candidate = await db.scalar(
+                select(EmailOutbox.id).where(*due).order_by(EmailOutbox.next_attempt_at).limit(1)
+            )
+            if candidate is None:
+                return None
+
+            # Conditional update so only one worker wins the entry
+            result = await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id == candidate, *due)
+                .values(
+                    status=OutboxStatus.SENDING,
+                    attempts=EmailOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+                )
+            )
+            await db.commit()
+            if result.rowcount != 1:
+                continue
+
+            entry = await db.get(EmailOutbox, candidate)
+            lead = await db.get(Lead, entry.lead_id)
+            return entry.id, entry.kind, entry.attempts, lead
+
+
+def _apply_result(entry: EmailOutbox, attempts: int, error: Optional[str]):
+    """Mark an entry as sent, schedule a retry, or dead-letter it."""
+    if error is None:
+        entry.status = OutboxStatus.SENT
+        entry.sent_at = datetime.utcnow()
+        entry.last_error = None
+    elif attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        entry.status = OutboxStatus.DEAD
+        entry.last_error = error
+        logger.error(f"Outbox entry {entry.id} dead-lettered after {attempts} attempts: {error}")
+    else:
+        delay = _backoff_delay(attempts)
+        entry.status = OutboxStatus.PENDING
+        entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        entry.last_error = error
+        logger.warning(f"Outbox entry {entry.id} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+
+
+async def _record_result(entry_id: int, attempts: int, error: Optional[str]):
+    async with AsyncSessionLocal() as db:
+        _apply_result(await db.get(EmailOutbox, entry_id), attempts, error)
+        await db.commit()
+
+
+async def _deliver(kind: str, lead: Lead) -> Optional[str]:
+    """Send one notification. Returns an error message, or None on success."""
+    # Imported here so the debug/production switch in email_config is respected
+    from services.email_config import send_prospect_notification, send_attorney_notification
+
+    senders = {
+        PROSPECT_NOTIFICATION: send_prospect_notification,
+        ATTORNEY_NOTIFICATION: send_attorney_notification,
+    }
+    if kind not in senders:
+        return f"Unknown notification kind: {kind}"
+    try:
+        success = await senders[kind](lead)
+    except Exception as e:
+        return str(e)
+    # Senders report failures by returning False rather than raising
+    return "Email sender reported a failure" if success is False else None
+
+
+async def process_next() -> bool:
+    """Deliver one due outbox entry. Returns False when nothing was due."""
+    claimed = await _claim_next()
+    if claimed is None:
+        return False
+
+    entry_id, kind, attempts, lead = claimed
+    if lead is None:
+        error = "Lead no longer exists"
+        attempts = settings.OUTBOX_MAX_ATTEMPTS
+    else:
+        error = await _deliver(kind, lead)
+
+    await _record_result(entry_id, attempts, error)
+    if error is None:
+        logger.info(f"Outbox entry {entry_id} delivered ({kind} notification for lead ID {lead.id})")
+    return True
+
+
+async def _claim_digest() -> Optional[Tuple[List[Tuple[int, int]], List[Lead]]]:
+    """
+    Claim the attorney notifications for the next digest, if one is due.
+
+    A digest is due once an entry's window (or retry backoff) has passed, or
+    when DIGEST_MAX_LEADS entries are waiting for their first attempt. It
+    then takes every waiting entry, up to DIGEST_MAX_LEADS. Returns
+    ([(entry_id, attempts)], leads) or None.
+    """
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        digest = EmailOutbox.kind == ATTORNEY_DIGEST
+        due = and_(EmailOutbox.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]),
+                   EmailOutbox.next_attempt_at <= now)
+        fresh = and_(EmailOutbox.status == OutboxStatus.PENDING, EmailOutbox.attempts == 0)
+
+        if await db.scalar(select(EmailOutbox.id).where(digest, due).limit(1)) is None:
+            waiting = await db.scalar(select(func.count(EmailOutbox.id)).where(digest, fresh))
+            if waiting < settings.DIGEST_MAX_LEADS:
+                return None
+
+        candidates = (await db.scalars(
+            select(EmailOutbox.id).where(digest, or_(due, fresh)).order_by(EmailOutbox.id).limit(settings.DIGEST_MAX_LEADS)
+        )).all()
+        # The lease expiry doubles as a claim token, so each worker can tell
+        # which of the candidates it won when several claim at once
+        lease = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS, microseconds=random.randrange(1_000_000))
+        await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(candidates), or_(due, fresh))
+            .values(status=OutboxStatus.SENDING, attempts=EmailOutbox.attempts + 1, next_attempt_at=lease)
+        )
+        await db.commit()
+
+        entries = (await db.execute(
+            select(EmailOutbox.id, EmailOutbox.attempts, EmailOutbox.lead_id)
+            .where(EmailOutbox.id.in_(candidates), EmailOutbox.status == OutboxStatus.SENDING,
+                   EmailOutbox.next_attempt_at == lease)
+        )).all()
+        if not entries:
+            return None
+        leads = (await db.scalars(
+            select(Lead).where(Lead.id.in_([lead_id for _, _, lead_id in entries])).order_by(Lead.id)
+        )).all()
+        return [(entry_id, attempts) for entry_id, attempts, _ in entries], leads
+
+
+async def process_digest() -> bool:
+    """Send the next attorney digest. Returns False when none was due."""
+    claimed = await _claim_digest()
+    if claimed is None:
+        return False
+
+    # Imported here so the debug/production switch in email_config is respected
+    from services.email_config import send_attorney_digest
+
+    entries, leads = claimed
+    error = None
+    if leads:
+        try:
+            success = await send_attorney_digest(leads)
+            error = "Email sender reported a failure" if success is False else None
+        except Exception as e:
+            error = str(e)
+
+    lead_ids = {lead.id for lead in leads}
+    async with AsyncSessionLocal() as db:
+        for entry_id, attempts in entries:
+            entry = await db.get(EmailOutbox, entry_id)
+            if entry.lead_id not in lead_ids:
+                _apply_result(entry, settings.OUTBOX_MAX_ATTEMPTS, "Lead no longer exists")
+            else:
+                _apply_result(entry, attempts, error)
+        await db.commit()
+
+    if not leads:
+        return True
+    if error is None:
+        digest_stats["sent"] += 1
+        digest_stats["leads"] += len(leads)
+        logger.info(f"Attorney digest delivered with {len(leads)} leads")
+    else:
+        digest_stats["failed"] += 1
+    return True
+
+
+async def _worker_loop(worker_id: int):
+    logger.info(f"Outbox worker {worker_id} started")
+    while True:
+        try:
+            # Check for a due digest even while individual notifications keep coming
+            sent = await process_next()
+            if await process_digest() or sent:
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Outbox worker {worker_id} error: {str(e)}", exc_info=True)
+
+        # Nothing due: sleep until the next poll or until new entries arrive
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def start_outbox_workers(count: Optional[int] = None):
+    """Start the delivery workers on the running event loop."""
+    global _wakeup
+    count = settings.OUTBOX_WORKERS if count is None else count
+    if count <= 0 or _workers:
+        return
+    _wakeup = asyncio.Event()
+    for worker_id in range(count):
+        _workers.append(asyncio.create_task(_worker_loop(worker_id)))
+    logger.info(f"Started {count} outbox delivery workers")
+
+
+async def stop_outbox_workers():
+    """Cancel the delivery workers. Claimed entries are retried after their lease expires."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def requeue_dead_letters(db: Session) -> int:
+    """Move dead-lettered entries back to PENDING for another round of attempts."""
+    count = db.query(EmailOutbox).filter(EmailOutbox.status == OutboxStatus.DEAD).update(
+        {
+            EmailOutbox.status: OutboxStatus.PENDING,
+            EmailOutbox.attempts: 0,
+            EmailOutbox.next_attempt_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return count
+
+
+async def _run_forever():
+    start_outbox_workers(max(settings.OUTBOX_WORKERS, 1))
+    await asyncio.gather(*_workers)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Deliver queued email notifications")
+    parser.add_argument("--requeue-dead", action="store_true", help="Retry dead-lettered entries and exit")
+    args = parser.parse_args()
+
+    if args.requeue_dead:
+        db = SessionLocal()
+        try:
+            logger.info(f"Requeued {requeue_dead_letters(db)} dead-lettered outbox entries")
+        finally:
+            db.close()
+    else:
+        asyncio.run(_run_forever())
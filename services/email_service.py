@@ -3,27 +3,37 @@ Email service module for sending real emails using SMTP
 """
 import os
 import logging
-import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
-from typing import Optional
+from typing import List, Optional
 
 from jinja2 import Template
+from starlette.concurrency import run_in_threadpool
 
 from config import settings
+from services.smtp_pool import get_smtp_pool
+from services.email_attachments import ResumeAttachment, measure_send, prepare_resume_attachment, with_attachment
 from models import Lead
+from utils.signed_urls import signed_resume_url
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-async def send_email(recipient_email: str, subject: str, html_content: str, attachment_path: Optional[str] = None):
+def _deliver_message(recipient_email: str, message: MIMEMultipart, attachment: Optional[ResumeAttachment] = None):
+    """Blocking SMTP delivery of a prepared message over a pooled session."""
+    # Messages with an attachment are streamed so the encoded file is never held in full
+    outgoing = with_attachment(message, attachment) if attachment else message.as_string()
+    with measure_send():
+        get_smtp_pool().send(settings.EMAIL_FROM, recipient_email, outgoing)
+
+async def send_email(recipient_email: str, subject: str, html_content: str, attachment: Optional[ResumeAttachment] = None):
     """
-    Send an email with optional attachment
+    Send an email with an optional resume attachment
     """
     try:
-        # Create message container
-        message = MIMEMultipart('alternative')
+        # Create message container; mixed when a file is attached, since the
+        # attachment is not an alternative rendering of the HTML
+        message = MIMEMultipart('mixed' if attachment else 'alternative')
         message['Subject'] = subject
         message['From'] = settings.EMAIL_FROM
         message['To'] = recipient_email
@@ -32,29 +42,8 @@ async def send_email(recipient_email: str, subject: str, html_content: str, atta
         html_part = MIMEText(html_content, 'html')
         message.attach(html_part)
 
-        # Attach file if provided
-        if attachment_path and os.path.exists(attachment_path):
-            try:
-                with open(attachment_path, 'rb') as file:
-                    attachment = MIMEApplication(file.read(), Name=os.path.basename(attachment_path))
-                    attachment['Content-Disposition'] = f'attachment; filename="{os.path.basename(attachment_path)}"'
-                    message.attach(attachment)
-            except Exception as e:
-                logger.error(f"Error attaching file: {str(e)}")
-                # Continue without attachment
-
-        # Connect to SMTP server
-        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
-        server.ehlo()
-        server.starttls()
-        server.ehlo()
-        
-        # Login with credentials
-        server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-        
-        # Send email
-        server.sendmail(settings.EMAIL_FROM, recipient_email, message.as_string())
-        server.quit()
+        # Deliver over SMTP in the threadpool so the event loop is not blocked
+        await run_in_threadpool(_deliver_message, recipient_email, message, attachment)
         
         logger.info(f"Email sent successfully to {recipient_email}")
         return True
@@ -102,8 +91,12 @@ async def send_attorney_notification(lead: Lead):
         # Get attorney email from settings
         attorney_email = settings.ATTORNEY_EMAIL
         
+        # Attach the resume, or link to it, as the attachment policy decides
+        attachment, resume_link = await prepare_resume_attachment(lead)
+
         # Create the email content
         subject = f"New lead submitted - {lead.first_name} {lead.last_name}"
+        resume_html = f'<p><a href="{resume_link}">Download the resume</a> (the link expires after a while).</p>' if resume_link else ""
         html_content = f"""
         <html>
             <body>
@@ -114,25 +107,14 @@ async def send_attorney_notification(lead: Lead):
                     <li><strong>Email:</strong> {lead.email}</li>
                     <li><strong>Time:</strong> {lead.created_at.strftime('%Y-%m-%d %H:%M:%S')}</li>
                 </ul>
+                {resume_html}
                 <p>Please log in to the dashboard to review this lead.</p>
             </body>
         </html>
         """
         
-        # Find the resume path to include as an attachment
-        attachment_path = None
-        if lead.resume_path:
-            # Check if it's a full path or just a filename
-            if os.path.exists(lead.resume_path):
-                attachment_path = lead.resume_path
-            else:
-                attachment_path = os.path.join(settings.UPLOAD_DIR, lead.resume_path)
-                if not os.path.exists(attachment_path):
-                    logger.warning(f"Resume file not found: {attachment_path}")
-                    attachment_path = None
-        
         # Send the email with attachment
-        success = await send_email(attorney_email, subject, html_content, attachment_path)
+        success = await send_email(attorney_email, subject, html_content, attachment)
         
         if success:
             logger.info(f"Notification email sent to attorney {attorney_email}")
@@ -142,4 +124,48 @@ async def send_attorney_notification(lead: Lead):
         return success
     except Exception as e:
         logger.error(f"Error sending attorney notification: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+async def send_attorney_digest(leads: List[Lead]):
+    """
+    Send one notification email to the attorney covering several new leads
+    """
+    try:
+        attorney_email = settings.ATTORNEY_EMAIL
+        first, last = leads[0].created_at, leads[-1].created_at
+
+        # Create the email content; resumes are linked rather than attached
+        subject = f"{len(leads)} new lead{'s' if len(leads) != 1 else ''} submitted"
+        if settings.DIGEST_LIST_LEADS:
+            items = "".join(
+                f"""
+                    <li><strong>{lead.first_name} {lead.last_name}</strong> ({lead.email}),
+                        {lead.created_at.strftime('%Y-%m-%d %H:%M:%S')}
+                        {f'- <a href="{signed_resume_url(lead.id, lead.resume_path)}">resume</a>' if lead.resume_path else ''}</li>"""
+                for lead in leads
+            )
+            details = f"<ul>{items}\n                </ul>"
+        else:
+            details = f"<p>Submitted between {first.strftime('%Y-%m-%d %H:%M:%S')} and {last.strftime('%Y-%m-%d %H:%M:%S')}.</p>"
+        html_content = f"""
+        <html>
+            <body>
+                <h1>New Lead Submissions</h1>
+                <p>{len(leads)} new lead{'s have' if len(leads) != 1 else ' has'} been submitted:</p>
+                {details}
+                <p>Please log in to the <a href="{settings.APP_BASE_URL.rstrip('/')}/dashboard">dashboard</a> to review these leads.</p>
+            </body>
+        </html>
+        """
+
+        success = await send_email(attorney_email, subject, html_content)
+
+        if success:
+            logger.info(f"Digest of {len(leads)} leads sent to attorney {attorney_email}")
+        else:
+            logger.error(f"Failed to send digest email to attorney {attorney_email}")
+
+        return success
+    except Exception as e:
+        logger.error(f"Error sending attorney digest: {str(e)}")
+        return False
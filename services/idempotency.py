@@ -0,0 +1,229 @@
+"""
+Idempotency keys for lead submission.
+
+A client that sends an Idempotency-Key header can retry a submission safely:
+the first request with a key claims it in the idempotency_keys table, and its
+response is stored in the same transaction as the lead. Retries get the
+stored response back without storing the resume, inserting a lead or queueing
+notifications again. A duplicate that arrives while the first request is
+still running waits for it (woken directly within a worker, by polling across
+workers) instead of racing it. Keys expire after IDEMPOTENCY_KEY_TTL.
+
+Keys are scoped to the submitting client (its normalized email), so two
+clients that happen to pick the same key neither conflict nor see each
+other's responses.
+"""
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from models import IdempotencyKey
+from utils.database import AsyncSessionLocal
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+# Seconds between checks on a key held by another worker
+POLL_INTERVAL = 0.2
+# Expired keys are deleted at most this often per worker
+PURGE_INTERVAL = 300.0
+
+# Aggregate counters for this worker
+idempotency_stats = {
+    "claimed": 0,
+    "replayed": 0,
+    "waited": 0,
+    "conflicts": 0,
+    "taken_over": 0,
+}
+
+# Wakes duplicates in this worker when the request holding their key finishes
+_finished: Dict[str, asyncio.Event] = {}
+_last_purge = 0.0
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: str
+
+    def to_response(self) -> JSONResponse:
+        return JSONResponse(
+            status_code=self.status_code,
+            content=json.loads(self.body),
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+def validate_key(key: str) -> str:
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} printable characters"
+        )
+    return key
+
+
+def scoped_key(key: str, client: str) -> str:
+    """The stored form of a client's key: a hash, so it fits the column whatever the key length."""
+    return hashlib.sha256(f"{client}\0{key}".encode()).hexdigest()
+
+
+def _file_digest(file) -> str:
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(settings.UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+async def upload_digest(upload: UploadFile) -> str:
+    """SHA-256 of an upload's content, read from its spooled file before anything is stored."""
+    return await run_in_threadpool(_file_digest, upload.file)
+
+
+def request_fingerprint(*parts) -> str:
+    """Hash of the values that identify a request, to detect a key reused for another one."""
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+async def _purge_expired():
+    global _last_purge
+    if time.monotonic() - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = time.monotonic()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+        await db.commit()
+    if result.rowcount:
+        logger.info(f"Purged {result.rowcount} expired idempotency keys")
+
+
+async def _wait_for(key: str, timeout: float):
+    event = _finished.setdefault(key, asyncio.Event())
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+def _wake(key: str):
+    event = _finished.pop(key, None)
+    if event is not None:
+        event.set()
+
+
+async def begin(key: str, fingerprint: str) -> Optional[StoredResponse]:
+    """
+    Claim `key` for a request.
+
+    Returns None when the caller now holds the key and must store its result
+    with complete_statement() or give the key up with release(), or the
+    stored response of the earlier request with this key. Raises a 422 if
+    the key was used for a different request, and a 409 if the request
+    holding it doesn't finish within IDEMPOTENCY_WAIT_SECONDS.
+    """
+    await _purge_expired()
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    waited = False
+    while True:
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+            db.add(IdempotencyKey(key=key, request_hash=fingerprint, created_at=now, expires_at=expires_at))
+            try:
+                await db.commit()
+                idempotency_stats["claimed"] += 1
+                return None
+            except IntegrityError:
+                await db.rollback()
+
+            existing = await db.get(IdempotencyKey, key)
+            if existing is None:
+                # Released or purged in the meantime
+                continue
+            abandoned = (existing.status_code is None
+                         and existing.created_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT))
+            if existing.expires_at <= now or abandoned:
+                # Conditional on created_at, so only one request takes the key over
+                result = await db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == key, IdempotencyKey.created_at == existing.created_at)
+                    .values(request_hash=fingerprint, status_code=None, response_body=None,
+                            created_at=now, expires_at=expires_at)
+                )
+                await db.commit()
+                if result.rowcount == 1:
+                    idempotency_stats["taken_over"] += 1
+                    return None
+                continue
+
+            if existing.request_hash != fingerprint:
+                idempotency_stats["conflicts"] += 1
+                raise HTTPException(
+                    status_code=422,  # Unprocessable content
+                    detail="Idempotency-Key was already used for a different submission"
+                )
+            if existing.status_code is not None:
+                idempotency_stats["replayed"] += 1
+                return StoredResponse(existing.status_code, existing.response_body)
+
+        # Still being processed by the first request
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A submission with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        if not waited:
+            waited = True
+            idempotency_stats["waited"] += 1
+        await _wait_for(key, min(POLL_INTERVAL, remaining))
+
+
+def complete_statement(key: str, status_code: int, body: str):
+    """
+    Statement that stores the response for `key`. Execute it in the same
+    transaction as the request's own writes, then call finished().
+    """
+    return (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body)
+    )
+
+
+def finished(key: str):
+    """Wake duplicates in this worker once the response for `key` is committed."""
+    _wake(key)
+
+
+async def release(key: str):
+    """Give up a claimed key after the request failed, so a retry can run it again."""
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None))
+            )
+            await db.commit()
+    except Exception as e:
+        # The key is taken over once IDEMPOTENCY_LOCK_TIMEOUT passes
+        logger.warning(f"Could not release idempotency key: {str(e)}")
+    finally:
+        _wake(key)
@@ -0,0 +1,193 @@
+"""
+Duplicate lead detection by normalized email.
+
+Every lead stores a normalized email key (see utils/email_normalization.py),
+indexed together with created_at, so the latest lead from the same mailbox
+within DUPLICATE_LEAD_WINDOW is found with a single index seek.
+DUPLICATE_LEAD_POLICY decides what submit_lead does with a duplicate:
+
+- "allow": create it as usual
+- "flag": create it with duplicate_of pointing at the first lead from the mailbox
+- "merge": update the earlier lead (name, resume and a note) instead of
+  creating one; no notifications are sent
+- "reject": refuse the submission with a 409
+
+Two submissions from the same mailbox arriving at the same moment can both be
+created. Leads created before the key existed, and imported leads, are
+covered by the backfill, which can also flag existing duplicates:
+
+    python -m services.lead_duplicates
+    python -m services.lead_duplicates --flag
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import Lead
+from utils.database import AsyncSessionLocal
+from utils.email_normalization import normalize_email
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+ALLOW = "allow"
+FLAG = "flag"
+MERGE = "merge"
+REJECT = "reject"
+POLICIES = (ALLOW, FLAG, MERGE, REJECT)
+
+# Aggregate counters for this worker
+duplicate_stats = {
+    "checked": 0,
+    "found": 0,
+    "flagged": 0,
+    "merged": 0,
+    "rejected": 0,
+}
+
+leads_table = Lead.__table__
+
+# Backfill statements. The key isn't part of the lead's representation, so
+# updated_at is left alone; flagging changes duplicate_of, which is.
+_set_key = (
+    update(leads_table)
+    .where(leads_table.c.id == bindparam("lead_id"))
+    .values(email_normalized=bindparam("key"), updated_at=leads_table.c.updated_at)
+)
+_set_duplicate_of = (
+    update(leads_table)
+    .where(leads_table.c.id == bindparam("lead_id"))
+    .values(duplicate_of=bindparam("original_id"))
+)
+
+
+def duplicate_policy() -> str:
+    if settings.DUPLICATE_LEAD_POLICY not in POLICIES:
+        raise RuntimeError(f"Unknown DUPLICATE_LEAD_POLICY: {settings.DUPLICATE_LEAD_POLICY}")
+    return settings.DUPLICATE_LEAD_POLICY
+
+
+async def find_duplicate(db: AsyncSession, email_normalized: Optional[str]) -> Optional[Lead]:
+    """The latest lead with this key created within DUPLICATE_LEAD_WINDOW, if any."""
+    if not email_normalized or settings.DUPLICATE_LEAD_WINDOW <= 0:
+        return None
+    duplicate_stats["checked"] += 1
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.DUPLICATE_LEAD_WINDOW)
+    lead = await db.scalar(
+        select(Lead)
+        .where(Lead.email_normalized == email_normalized, Lead.created_at >= cutoff)
+        .order_by(Lead.created_at.desc())
+        .limit(1)
+    )
+    if lead is not None:
+        duplicate_stats["found"] += 1
+    return lead
+
+
+def merge_submission(lead: Lead, first_name: str, last_name: str, resume_path: str) -> Optional[str]:
+    """
+    Fold a resubmission into an earlier lead. Returns the lead's previous
+    resume path if the resume changed (None if it didn't), so the caller can
+    move its resume_blobs reference in the same transaction.
+    """
+    lead.first_name = first_name
+    lead.last_name = last_name
+    note = f"Resubmitted on {datetime.utcnow():%Y-%m-%d %H:%M} UTC"
+    lead.notes = f"{lead.notes}\n{note}" if lead.notes else note
+    if resume_path == lead.resume_path:
+        return None
+    previous = lead.resume_path
+    lead.resume_path = resume_path
+    lead.resume_text = None
+    return previous
+
+
+async def _normalize_existing(batch_size: int) -> int:
+    normalized = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(Lead.id, Lead.email)
+                .where(Lead.id > last_id, Lead.email_normalized.is_(None))
+                .order_by(Lead.id)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            await db.execute(_set_key, [{"lead_id": lead_id, "key": normalize_email(email)} for lead_id, email in rows])
+            await db.commit()
+        normalized += len(rows)
+        logger.info(f"Normalized {normalized} lead emails")
+    return normalized
+
+
+async def _flag_existing(batch_size: int) -> int:
+    """
+    Set duplicate_of the way submit_lead would have: a lead created within the
+    window after another one from the same mailbox belongs to that one's first lead.
+    """
+    window = timedelta(seconds=settings.DUPLICATE_LEAD_WINDOW)
+    flagged = 0
+    last = None  # (key, created_at, id) of the previous lead, in key order
+    original_id = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(Lead.id, Lead.email_normalized, Lead.created_at, Lead.duplicate_of).where(
+                Lead.email_normalized.isnot(None), Lead.created_at.isnot(None)
+            )
+            if last is not None:
+                key, created_at, lead_id = last
+                query = query.where(or_(
+                    Lead.email_normalized > key,
+                    and_(Lead.email_normalized == key, or_(
+                        Lead.created_at > created_at,
+                        and_(Lead.created_at == created_at, Lead.id > lead_id),
+                    )),
+                ))
+            rows = (await db.execute(
+                query.order_by(Lead.email_normalized, Lead.created_at, Lead.id).limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            updates = []
+            for lead_id, key, created_at, duplicate_of in rows:
+                if last is not None and key == last[0] and created_at - last[1] <= window:
+                    if duplicate_of is None:
+                        updates.append({"lead_id": lead_id, "original_id": original_id})
+                else:
+                    original_id = lead_id
+                last = (key, created_at, lead_id)
+            if updates:
+                await db.execute(_set_duplicate_of, updates)
+                await db.commit()
+        flagged += len(updates)
+    return flagged
+
+
+async def backfill(batch_size: int = 1000, flag: bool = False) -> dict:
+    """Store the normalized email of every lead that has none, optionally flagging duplicates."""
+    counts = {"normalized": await _normalize_existing(batch_size), "flagged": 0}
+    if flag:
+        counts["flagged"] = await _flag_existing(batch_size)
+    return counts
+
+
+if __name__ == "__main__":
+    import asyncio
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Backfill normalized lead emails for duplicate detection")
+    parser.add_argument("--flag", action="store_true",
+                        help="Also set duplicate_of on existing leads within DUPLICATE_LEAD_WINDOW of an earlier one")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    counts = asyncio.run(backfill(args.batch_size, args.flag))
+    logger.info(f"Backfill finished: {counts}")
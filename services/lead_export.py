@@ -0,0 +1,83 @@
+"""
+Streaming lead export as CSV or NDJSON.
+
+Rows are read with yield_per, which uses a server-side cursor on PostgreSQL,
+and encoded a batch at a time, so memory use is the same for a thousand leads
+as for ten million.
+"""
+import io
+import csv
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List
+
+from config import settings
+from models import Lead
+from utils.database import AsyncSessionLocal
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+MEDIA_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    NDJSON: "application/x-ndjson",
+}
+
+EXPORT_COLUMNS = [
+    "id", "first_name", "last_name", "email", "state", "notes", "resume_path",
+    "created_at", "updated_at", "reached_out_at", "reached_out_by",
+]
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def _csv_value(value):
+    return "" if value is None else _export_value(value)
+
+
+def _encode_csv(leads: List[Lead], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for lead in leads:
+        writer.writerow([_csv_value(getattr(lead, column)) for column in EXPORT_COLUMNS])
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(leads: List[Lead]) -> bytes:
+    return "".join(
+        json.dumps({column: _export_value(getattr(lead, column)) for column in EXPORT_COLUMNS}) + "\n"
+        for lead in leads
+    ).encode()
+
+
+async def iter_export(statement, fmt: str, batch_size: int = None) -> AsyncIterator[bytes]:
+    """
+    Stream the leads selected by a select(Lead) statement in the given format.
+
+    Uses its own session so it can outlive the request's dependencies while the
+    response is being sent.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    exported = 0
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(statement.execution_options(yield_per=batch_size))
+        if fmt == CSV:
+            # The header goes out even when nothing matches
+            yield _encode_csv([], header=True)
+        async for leads in result.partitions():
+            yield _encode_csv(leads, header=False) if fmt == CSV else _encode_ndjson(leads)
+            # The identity map holds loaded leads weakly, so each batch is freed once encoded
+            exported += len(leads)
+    logger.info(f"Exported {exported} leads as {fmt}")
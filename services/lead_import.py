@@ -0,0 +1,241 @@
+"""
+Bulk lead import from CSV or NDJSON.
+
+Files are parsed incrementally, validated row by row with the LeadCreate
+schema, and inserted in batches: COPY on PostgreSQL (asyncpg), executemany
+elsewhere. Each batch is committed on its own, so memory use depends on the
+batch size rather than the file size. Imported leads do not trigger email
+notifications. Also runs as a script:
+
+    python -m services.lead_import leads.csv
+    python -m services.lead_import leads.ndjson --batch-size 5000
+"""
+import io
+import csv
+import json
+import time
+import logging
+from datetime import datetime
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from models import Lead, LeadState
+from schemas import LeadCreate
+from utils.email_normalization import normalize_email
+from utils.lead_counts import lead_count_cache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+LEAD_COLUMNS = ["first_name", "last_name", "email", "email_normalized", "notes", "state", "created_at", "updated_at"]
+
+# A parsed row: (line number, field dict) or (line number, parse error message)
+ParsedRow = Tuple[int, object]
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> Optional[str]:
+    """Guess the import format from a filename or content type."""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return NDJSON
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return CSV
+    return None
+
+
+def _normalize_header(name: str) -> str:
+    return name.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def iter_csv_rows(text: io.TextIOBase) -> Iterator[ParsedRow]:
+    """Yield rows of a CSV file with a header line, keyed by normalized column name."""
+    reader = csv.reader(text)
+    try:
+        header = [_normalize_header(name) for name in next(reader)]
+    except StopIteration:
+        return
+    for row in reader:
+        if not any(field.strip() for field in row):
+            continue
+        if len(row) > len(header):
+            yield reader.line_num, f"Expected {len(header)} columns, found {len(row)}"
+            continue
+        yield reader.line_num, dict(zip(header, row))
+
+
+def iter_ndjson_rows(text: io.TextIOBase) -> Iterator[ParsedRow]:
+    """Yield the JSON object on each non-blank line."""
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, row
+
+
+def iter_rows(stream: BinaryIO, fmt: str) -> Iterator[ParsedRow]:
+    """Parse a binary stream incrementally in the given format."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == CSV:
+            yield from iter_csv_rows(text)
+        elif fmt == NDJSON:
+            yield from iter_ndjson_rows(text)
+        else:
+            raise ValueError(f"Unsupported import format: {fmt}")
+    finally:
+        # Leave the underlying stream open for the caller
+        text.detach()
+
+
+def _next_batch(rows: Iterator[ParsedRow], size: int) -> List[ParsedRow]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+def _validate(row: Dict[str, object]) -> Tuple[Optional[LeadCreate], Optional[str]]:
+    """Validate one row, treating empty strings as missing values."""
+    fields = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items()}
+    fields = {key: value for key, value in fields.items() if value not in ("", None)}
+    try:
+        return LeadCreate(**fields), None
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+        )
+        return None, problems
+    except TypeError as e:
+        return None, str(e)
+
+
+async def _insert_batch(db: AsyncSession, leads: List[LeadCreate]):
+    now = datetime.utcnow()
+    records = [
+        (lead.first_name, lead.last_name, lead.email, normalize_email(lead.email), lead.notes,
+         LeadState.PENDING.value, now, now)
+        for lead in leads
+    ]
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg" and settings.IMPORT_USE_COPY:
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table("leads", records=records, columns=LEAD_COLUMNS)
+    else:
+        await db.execute(insert(Lead), [dict(zip(LEAD_COLUMNS, record)) for record in records])
+
+
+async def iter_import(db: AsyncSession, stream: BinaryIO, fmt: str,
+                      batch_size: Optional[int] = None) -> AsyncIterator[dict]:
+    """
+    Import leads from `stream`, yielding events as the import progresses.
+
+    Yields {"event": "error", "line", "error"} for every rejected row,
+    {"event": "progress", ...} after each committed batch, and finally
+    {"event": "summary", ...}. Parsing runs in a worker thread so large
+    files don't block the event loop.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    rows = iter_rows(stream, fmt)
+    processed = imported = failed = batches = 0
+    started = time.perf_counter()
+
+    while True:
+        batch = await run_in_threadpool(_next_batch, rows, batch_size)
+        if not batch:
+            break
+
+        valid = []
+        for line_number, row in batch:
+            processed += 1
+            if isinstance(row, str):
+                lead, error = None, row
+            else:
+                lead, error = _validate(row)
+            if lead is None:
+                failed += 1
+                yield {"event": "error", "line": line_number, "error": error}
+            else:
+                valid.append(lead)
+
+        if valid:
+            await _insert_batch(db, valid)
+            await db.commit()
+            lead_count_cache.invalidate()
+            imported += len(valid)
+        batches += 1
+
+        yield {
+            "event": "progress",
+            "processed": processed,
+            "imported": imported,
+            "failed": failed,
+            "batches": batches,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    duration = time.perf_counter() - started
+    yield {
+        "event": "summary",
+        "processed": processed,
+        "imported": imported,
+        "failed": failed,
+        "batches": batches,
+        "seconds": round(duration, 3),
+        "rows_per_second": round(processed / duration, 1) if duration else 0.0,
+    }
+
+
+async def _import_file(path: str, fmt: Optional[str], batch_size: Optional[int]) -> int:
+    from utils.database import AsyncSessionLocal
+
+    fmt = fmt or detect_format(path)
+    if fmt is None:
+        logger.error(f"Cannot tell the format of {path}, pass --format")
+        return 2
+
+    summary = {}
+    with open(path, "rb") as stream:
+        async with AsyncSessionLocal() as db:
+            async for event in iter_import(db, stream, fmt, batch_size):
+                if event["event"] == "error":
+                    logger.warning(f"Line {event['line']}: {event['error']}")
+                elif event["event"] == "progress":
+                    logger.info(f"Processed {event['processed']} rows: {event['imported']} imported, "
+                                f"{event['failed']} rejected ({event['seconds']:.1f}s)")
+                else:
+                    summary = event
+    logger.info(f"Import finished: {summary['imported']} of {summary['processed']} rows imported "
+                f"in {summary['seconds']:.1f}s ({summary['rows_per_second']} rows/s)")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    import sys
+    import asyncio
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Import leads from a CSV or NDJSON file")
+    parser.add_argument("path", help="File to import")
+    parser.add_argument("--format", choices=[CSV, NDJSON], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, help=f"Rows per insert (default {settings.IMPORT_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(_import_file(args.path, args.format, args.batch_size)))
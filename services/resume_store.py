@@ -0,0 +1,319 @@
+"""
+Content-addressed resume storage.
+
+Each distinct resume is stored once in the storage backend, under a key derived
+from the SHA-256 of its content and sharded into two levels of prefixes
+(ab/cd/abcd...ef.pdf). The hash is computed while the upload streams in.
+With RESUME_COMPRESSION, files are zstd-compressed as they stream and their
+key gains a ".zst" suffix; read them with read_resume/iter_resume, which
+decompress transparently. The resume_blobs table counts the leads whose
+resume_path points at each file, one row per storage key: the same content
+stored with another extension or compression setting is a separate file. Also runs as a script:
+
+    python -m services.resume_store migrate   # move flat uploads in UPLOAD_DIR into the store
+    python -m services.resume_store gc        # recount references, delete unreferenced files
+"""
+import os
+import time
+import hashlib
+import logging
+import mimetypes
+from datetime import datetime
+from typing import Iterator, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from models import Lead, ResumeBlob
+from services.storage import StorageBackend, StoredObject, get_storage
+from utils.compression import compression_available, is_compressed_key, iter_decompressed, original_key
+from utils.uploads import UploadResult, save_upload
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Files younger than this are never collected, so uploads whose lead has not
+# been committed yet are safe from gc
+GC_GRACE_SECONDS = 3600
+
+
+def shard_path(digest: str, extension: str) -> str:
+    """Storage key for content with the given SHA-256."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}"
+
+
+def is_content_addressed(resume_path: Optional[str]) -> bool:
+    return bool(resume_path) and resume_path.count("/") == 2
+
+
+async def store_resume(upload: UploadFile, extension: str) -> UploadResult:
+    """
+    Stream an uploaded resume into the store.
+
+    Identical content already in the store is not written again; the result's
+    `filename` is the shared path either way and `deduplicated` tells which.
+    """
+    compress_level = None
+    if settings.RESUME_COMPRESSION:
+        if compression_available():
+            compress_level = settings.RESUME_COMPRESSION_LEVEL
+        else:
+            logger.warning("RESUME_COMPRESSION is set but zstandard is not installed, storing uncompressed")
+    return await save_upload(upload, lambda digest: shard_path(digest, extension), compress_level=compress_level)
+
+
+async def ensure_resume_stored(upload: UploadFile, result: UploadResult, extension: str) -> bool:
+    """
+    Store a deduplicated upload again if gc deleted the shared file before the
+    lead's reference was committed. Call after the commit; returns True if the
+    file had to be restored.
+    """
+    storage = get_storage()
+    if not result.deduplicated or await run_in_threadpool(storage.exists, result.filename):
+        return False
+    await upload.seek(0)
+    restored = await store_resume(upload, extension)
+    if restored.filename != result.filename:
+        logger.error(f"Collected resume {result.filename} was restored as {restored.filename}")
+    else:
+        logger.warning(f"Restored resume {result.filename}, collected while its lead was being saved")
+    return True
+
+
+def resume_extension(resume_path: str) -> str:
+    """Extension of the original file, without any compression suffix."""
+    return os.path.splitext(original_key(resume_path))[1]
+
+
+def resume_filename(lead: Lead) -> str:
+    """Filename a lead's resume is downloaded or attached as."""
+    return f"{lead.first_name}_{lead.last_name}_resume{resume_extension(lead.resume_path)}"
+
+
+def resume_media_type(resume_path: str) -> str:
+    return mimetypes.guess_type(original_key(resume_path))[0] or "application/octet-stream"
+
+
+def iter_resume(resume_path: str, start: int = 0, end: Optional[int] = None,
+                storage: Optional[StorageBackend] = None) -> Iterator[bytes]:
+    """
+    Stream bytes `start` to `end` (inclusive) of a stored resume's original
+    content, decompressing if needed. Blocking, like the storage backends.
+    """
+    storage = storage or get_storage()
+    if is_compressed_key(resume_path):
+        return iter_decompressed(storage.iter_range(resume_path), start, end)
+    return storage.iter_range(resume_path, start, end)
+
+
+def read_resume(resume_path: str, storage: Optional[StorageBackend] = None) -> bytes:
+    """The original content of a stored resume. Blocking."""
+    return b"".join(iter_resume(resume_path, storage=storage))
+
+
+async def resume_size(db: AsyncSession, stored: StoredObject, storage: Optional[StorageBackend] = None) -> int:
+    """Size of a stored resume's original content, given its storage metadata."""
+    if not is_compressed_key(stored.key):
+        return stored.size
+    size = await db.scalar(select(ResumeBlob.size).where(ResumeBlob.path == stored.key))
+    if size is None:
+        size = await run_in_threadpool(
+            lambda: sum(len(chunk) for chunk in iter_resume(stored.key, storage=storage))
+        )
+    return size
+
+
+def add_reference(dialect: str, sha256: str, path: str, size: int):
+    """
+    Statement that records one more lead referencing a stored file.
+
+    Execute it in the same transaction that saves the lead.
+    """
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    statement = insert(ResumeBlob).values(
+        sha256=sha256, path=path, size=size, ref_count=1, created_at=datetime.utcnow()
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[ResumeBlob.path],
+        set_={"ref_count": ResumeBlob.ref_count + 1},
+    )
+
+
+def drop_reference(path: str):
+    """
+    Statement that records one lead fewer referencing a stored file, e.g. when
+    a merge replaces a lead's resume. Execute it in the same transaction.
+    """
+    return (
+        update(ResumeBlob)
+        .where(ResumeBlob.path == path, ResumeBlob.ref_count > 0)
+        .values(ref_count=ResumeBlob.ref_count - 1)
+    )
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate_flat_uploads(db: Session, batch_size: int = 100, storage: Optional[StorageBackend] = None) -> dict:
+    """
+    Move resumes stored in UPLOAD_DIR under flat uuid names into the
+    content-addressed store.
+
+    Each batch of leads is repointed and committed before the old files are
+    removed, so an interrupted run leaves every lead pointing at a file that
+    exists. Safe to run repeatedly.
+    """
+    storage = storage or get_storage()
+    counts = {"migrated": 0, "deduplicated": 0, "missing": 0}
+    dialect = db.get_bind().dialect.name
+    last_id = 0
+    while True:
+        leads = db.scalars(
+            select(Lead)
+            .where(Lead.id > last_id, Lead.resume_path.isnot(None), Lead.resume_path.notlike("%/%"))
+            .order_by(Lead.id)
+            .limit(batch_size)
+        ).all()
+        if not leads:
+            break
+        last_id = leads[-1].id
+
+        obsolete = []
+        for lead in leads:
+            source = os.path.join(settings.UPLOAD_DIR, lead.resume_path)
+            if not os.path.isfile(source):
+                logger.warning(f"Resume for lead ID {lead.id} is missing: {source}")
+                counts["missing"] += 1
+                continue
+            digest = _hash_file(source)
+            path = shard_path(digest, os.path.splitext(lead.resume_path)[1])
+            if not storage.put_file(path, source, keep_source=True):
+                counts["deduplicated"] += 1
+            db.execute(add_reference(dialect, digest, path, os.path.getsize(source)))
+            lead.resume_path = path
+            obsolete.append(source)
+            counts["migrated"] += 1
+
+        db.commit()
+        for source in obsolete:
+            if os.path.exists(source):
+                os.remove(source)
+        logger.info(f"Migrated {counts['migrated']} resumes ({counts['deduplicated']} duplicates)")
+    return counts
+
+
+def collect_garbage(db: Session, storage: Optional[StorageBackend] = None) -> dict:
+    """
+    Recount references from Lead.resume_path, then delete unreferenced files.
+
+    Files are kept if any lead points at them, whether or not they have a
+    resume_blobs row; rows missing for referenced files are added. Files
+    younger than GC_GRACE_SECONDS are kept, since their lead may not have been
+    committed yet.
+
+    A file is only deleted together with its row, by a DELETE conditional on
+    ref_count still being 0, so a lead that took a reference since the
+    recount keeps it. The file goes before that DELETE commits: a submission
+    deduplicated onto it waits for the commit, then finds the file missing
+    and stores it again (ensure_resume_stored).
+    """
+    storage = storage or get_storage()
+    counts = {"recounted": 0, "registered": 0, "deleted_blobs": 0, "deleted_files": 0}
+    references = (
+        select(func.count(Lead.id)).where(Lead.resume_path == ResumeBlob.path).scalar_subquery()
+    )
+    counts["recounted"] = db.execute(
+        update(ResumeBlob).values(ref_count=references).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+
+    referenced = dict(db.execute(
+        select(Lead.resume_path, func.count(Lead.id))
+        .where(Lead.resume_path.isnot(None))
+        .group_by(Lead.resume_path)
+    ).all())
+    registered = set(db.scalars(select(ResumeBlob.path)).all())
+    cutoff = time.time() - GC_GRACE_SECONDS
+    for stored in storage.list():
+        if not is_content_addressed(stored.key):
+            continue
+        if stored.key in referenced:
+            if stored.key not in registered:
+                _register_blob(db, stored, referenced[stored.key], storage)
+                counts["registered"] += 1
+            continue
+        if stored.modified > cutoff:
+            continue
+        if stored.key not in registered:
+            # Tracked from here on, so the conditional delete covers it too
+            _register_blob(db, stored, 0, storage)
+            db.commit()
+            counts["registered"] += 1
+        # Deduplicated uploads touch the file; the listing may predate that
+        current = storage.stat(stored.key)
+        if current is None or current.modified > cutoff:
+            continue
+        try:
+            deleted = db.execute(_delete_unreferenced(stored.key)).rowcount
+            if deleted:
+                storage.delete(stored.key)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if deleted:
+            counts["deleted_blobs"] += 1
+            counts["deleted_files"] += 1
+
+    # Forget blobs whose file is gone and nobody references
+    for path in db.scalars(select(ResumeBlob.path).where(ResumeBlob.ref_count <= 0)).all():
+        if not storage.exists(path):
+            counts["deleted_blobs"] += db.execute(_delete_unreferenced(path)).rowcount
+    db.commit()
+    return counts
+
+
+def _delete_unreferenced(path: str):
+    return delete(ResumeBlob).where(ResumeBlob.path == path, ResumeBlob.ref_count <= 0)
+
+
+def _register_blob(db: Session, stored: StoredObject, ref_count: int, storage: StorageBackend):
+    """Add the missing resume_blobs row of a referenced file, hashing its original content."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter_resume(stored.key, storage=storage):
+        digest.update(chunk)
+        size += len(chunk)
+    db.add(ResumeBlob(sha256=digest.hexdigest(), path=stored.key, size=size, ref_count=ref_count))
+    logger.info(f"Registered untracked resume {stored.key} ({ref_count} references)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from utils.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed resume store")
+    parser.add_argument("command", choices=["migrate", "gc"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "migrate":
+            logger.info(f"Migration finished: {migrate_flat_uploads(db)}")
+        else:
+            logger.info(f"Garbage collection finished: {collect_garbage(db)}")
+    finally:
+        db.close()
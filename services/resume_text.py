@@ -0,0 +1,264 @@
+"""
+Background resume text extraction.
+
+Text is extracted from PDF, DOCX and TXT resumes in a process pool, off the
+request path, and stored in Lead.resume_text where the lead search index
+picks it up. Submitted resumes are queued in memory for the workers started
+with the app (see RESUME_TEXT_WORKERS). Resumes uploaded earlier, or missed
+because the queue was full or the app restarted, are handled by the backfill:
+
+    python -m services.resume_text
+"""
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from models import Lead
+from services.resume_store import read_resume, resume_extension
+from utils.database import AsyncSessionLocal
+from utils.text_extraction import extract_text_or_error
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Aggregate counters for this worker
+extraction_stats = {
+    "extracted": 0,
+    "reused": 0,
+    "failed": 0,
+    "timed_out": 0,
+    "dropped": 0,
+    "seconds": 0.0,
+}
+
+
+class TextExtractor:
+    """
+    Process pool running text extraction with a per-file timeout.
+
+    A file that exceeds the timeout keeps its worker process busy, so the
+    pool is replaced and its processes terminated. Extractions running
+    alongside it fail with BrokenProcessPool and are retried by the caller.
+    """
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process that runs an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def extract(self, data: bytes, extension: str) -> Tuple[str, Optional[str]]:
+        """Returns (text, error); raises for timeouts and pool failures."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_pool(), extract_text_or_error, data, extension, settings.RESUME_TEXT_MAX_CHARS
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self._recycle()
+            raise
+
+    def _recycle(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        processes = list(pool._processes.values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+async def _store_text(resume_path: str, text: str):
+    """Save the text on every lead sharing the stored file, without touching updated_at."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Lead)
+            .where(Lead.resume_path == resume_path, Lead.resume_text.is_(None))
+            .values(resume_text=text, updated_at=Lead.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+async def process_resume(resume_path: str, extractor: TextExtractor) -> bool:
+    """
+    Extract and store the text of one stored resume.
+
+    Returns False when the resume should be retried later (storage errors,
+    a missing extractor package, or a pool failure such as one broken by
+    another file's timeout). Files that fail to parse or time out are stored
+    with empty text.
+    """
+    async with AsyncSessionLocal() as db:
+        # Content-addressed files are shared, another lead may already have the text
+        existing = await db.scalar(
+            select(Lead.resume_text)
+            .where(Lead.resume_path == resume_path, Lead.resume_text.isnot(None))
+            .limit(1)
+        )
+    if existing is not None:
+        await _store_text(resume_path, existing)
+        extraction_stats["reused"] += 1
+        return True
+
+    try:
+        data = await run_in_threadpool(read_resume, resume_path)
+    except Exception as e:
+        logger.warning(f"Could not read resume {resume_path} for text extraction: {str(e)}")
+        return False
+
+    started = time.perf_counter()
+    try:
+        text, error = await extractor.extract(data, resume_extension(resume_path))
+    except asyncio.TimeoutError:
+        logger.warning(f"Text extraction for {resume_path} timed out after {extractor.timeout}s")
+        extraction_stats["timed_out"] += 1
+        text, error = "", None
+    except Exception as e:
+        # Missing extractor package, broken pool, worker startup failure
+        logger.warning(f"Text extraction for {resume_path} deferred: {str(e)}")
+        return False
+    else:
+        if error:
+            logger.warning(f"Could not extract text from {resume_path}: {error}")
+            extraction_stats["failed"] += 1
+        else:
+            extraction_stats["extracted"] += 1
+    extraction_stats["seconds"] += time.perf_counter() - started
+
+    await _store_text(resume_path, text)
+    logger.info(f"Extracted {len(text)} characters of text from {resume_path}")
+    return True
+
+
+_extractor: Optional[TextExtractor] = None
+_queue: Optional[asyncio.Queue] = None
+# Paths waiting in or taken from the queue, so shared files are processed once
+_queued: Set[str] = set()
+_workers: List[asyncio.Task] = []
+
+
+def schedule_extraction(resume_path: str):
+    """Queue a stored resume for text extraction. Never blocks."""
+    if _queue is None or resume_path in _queued:
+        return
+    try:
+        _queue.put_nowait(resume_path)
+    except asyncio.QueueFull:
+        extraction_stats["dropped"] += 1
+        logger.warning(f"Text extraction queue is full, {resume_path} is left for the backfill")
+        return
+    _queued.add(resume_path)
+
+
+async def _worker_loop(worker_id: int):
+    while True:
+        resume_path = await _queue.get()
+        try:
+            if not await process_resume(resume_path, _extractor):
+                logger.info(f"Extraction worker {worker_id} will leave {resume_path} for the backfill")
+        except Exception as e:
+            logger.error(f"Extraction worker {worker_id} failed on {resume_path}: {str(e)}")
+        finally:
+            _queued.discard(resume_path)
+            _queue.task_done()
+
+
+def start_resume_text_workers(count: Optional[int] = None):
+    """Start the extraction workers (one pool process each) on the running event loop."""
+    global _extractor, _queue
+    count = settings.RESUME_TEXT_WORKERS if count is None else count
+    if count <= 0 or _workers:
+        return
+    _extractor = TextExtractor(count, settings.RESUME_TEXT_TIMEOUT)
+    _queue = asyncio.Queue(maxsize=settings.RESUME_TEXT_QUEUE_SIZE)
+    for worker_id in range(count):
+        _workers.append(asyncio.create_task(_worker_loop(worker_id)))
+    logger.info(f"Started {count} resume text extraction workers")
+
+
+async def stop_resume_text_workers():
+    """Cancel the extraction workers. Unfinished resumes are picked up by the backfill."""
+    global _queue
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queued.clear()
+    _queue = None
+    if _extractor is not None:
+        _extractor.shutdown()
+
+
+def stats() -> dict:
+    return {
+        **extraction_stats,
+        "workers": len(_workers),
+        "queued": _queue.qsize() if _queue is not None else 0,
+    }
+
+
+async def backfill(workers: int, timeout: float, batch_size: int = 100) -> dict:
+    """Extract text for every stored resume that has none yet."""
+    extractor = TextExtractor(workers, timeout)
+    limit = asyncio.Semaphore(workers)
+    counts = {"processed": 0, "deferred": 0}
+
+    async def run(resume_path: str):
+        async with limit:
+            done = await process_resume(resume_path, extractor)
+        counts["processed" if done else "deferred"] += 1
+
+    last_path = ""
+    try:
+        while True:
+            async with AsyncSessionLocal() as db:
+                paths = (await db.scalars(
+                    select(Lead.resume_path)
+                    .where(Lead.resume_path > last_path, Lead.resume_text.is_(None))
+                    .group_by(Lead.resume_path)
+                    .order_by(Lead.resume_path)
+                    .limit(batch_size)
+                )).all()
+            if not paths:
+                break
+            last_path = paths[-1]
+            await asyncio.gather(*(run(path) for path in paths))
+            logger.info(f"Backfilled {counts['processed']} resumes ({counts['deferred']} deferred)")
+    finally:
+        extractor.shutdown()
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Extract text from stored resumes that have none yet")
+    parser.add_argument("--workers", type=int, default=max(settings.RESUME_TEXT_WORKERS, os.cpu_count() or 1))
+    parser.add_argument("--timeout", type=float, default=settings.RESUME_TEXT_TIMEOUT)
+    args = parser.parse_args()
+
+    counts = asyncio.run(backfill(args.workers, args.timeout))
+    logger.info(f"Backfill finished: {counts}, extraction stats: {extraction_stats}")
@@ -0,0 +1,298 @@
+"""
+Bounded pool of persistent, authenticated SMTP connections
+"""
+import re
+import time
+import logging
+import smtplib
+import threading
+from collections import deque
+from contextlib import contextmanager
+from email.message import Message
+from typing import Callable, Iterable, Optional, Sequence, Union
+
+from config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# A message is a prepared email.message.Message, an already serialized string, or a
+# function returning the serialized message as chunks of CRLF-terminated lines, which
+# is streamed to the server without being held in memory as a whole
+OutgoingMessage = Union[Message, str, bytes, Callable[[], Iterable[bytes]]]
+
+
+def _dot_stuff(chunks: Iterable[bytes]) -> Iterable[bytes]:
+    """Escape lines starting with "." for the DATA command (RFC 5321 4.5.2)."""
+    line_start = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        stuffed = re.sub(rb"(?m)^\.", b"..", chunk)
+        if not line_start and chunk.startswith(b"."):
+            # The chunk continues a line, so its first "." isn't at a line start
+            stuffed = stuffed[1:]
+        line_start = chunk.endswith(b"\n")
+        yield stuffed
+
+
+def sendmail_streamed(server: smtplib.SMTP, from_addr: str, to_addrs: Union[str, Sequence[str]],
+                      chunks: Iterable[bytes]):
+    """
+    smtplib's sendmail for a message given as chunks of CRLF-terminated lines,
+    written to the socket as they are produced.
+    """
+    if isinstance(to_addrs, str):
+        to_addrs = [to_addrs]
+    server.ehlo_or_helo_if_needed()
+    code, response = server.mail(from_addr)
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPSenderRefused(code, response, from_addr)
+    refused = {}
+    for address in to_addrs:
+        code, response = server.rcpt(address)
+        if code not in (250, 251):
+            refused[address] = (code, response)
+    if len(refused) == len(to_addrs):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+    code, response = server.docmd("data")
+    if code != 354:
+        server.rset()
+        raise smtplib.SMTPDataError(code, response)
+    ends_with_newline = True
+    try:
+        for chunk in _dot_stuff(chunks):
+            server.send(chunk)
+            ends_with_newline = chunk.endswith(b"\r\n")
+    except Exception:
+        # The server is mid-DATA and would take anything sent next as message content
+        server.close()
+        raise
+    server.send(b".\r\n" if ends_with_newline else b"\r\n.\r\n")
+    code, response = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, response)
+    return refused
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """True if the session can no longer be trusted after this error."""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # Any other SMTPException means the server replied, so the session is still alive
+    # (SMTPException is itself an OSError subclass)
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool that reuses authenticated SMTP sessions.
+
+    At most `max_size` connections are checked out at once. Idle connections
+    are health-checked with NOOP before reuse once they have been idle for
+    `noop_after` seconds, and are closed after `idle_timeout` seconds.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = True, max_size: int = 4, idle_timeout: float = 60.0,
+                 noop_after: float = 10.0, timeout: float = 30.0, debuglevel: int = 0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self.debuglevel = debuglevel
+
+        self._idle = deque()  # (connection, last_used) pairs, most recently used last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._in_use = 0
+
+        # Metrics
+        self._created = 0
+        self._reused = 0
+        self._discarded = 0
+        self._sends = 0
+        self._failures = 0
+        self._send_seconds = 0.0
+        self._last_send_seconds = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP session."""
+        logger.debug(f"Opening SMTP connection to {self.host}:{self.port}")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.set_debuglevel(self.debuglevel)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            self._created += 1
+        return server
+
+    def _close(self, server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _is_healthy(self, server: smtplib.SMTP, idle_for: float) -> bool:
+        """Check a pooled connection with NOOP if it has been idle for a while."""
+        if idle_for < self.noop_after:
+            return True
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        """Take an idle connection from the pool, or open a new one."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+
+            idle_for = time.monotonic() - last_used
+            if idle_for < self.idle_timeout and self._is_healthy(server, idle_for):
+                with self._lock:
+                    self._reused += 1
+                return server
+
+            # Stale or dropped by the server
+            with self._lock:
+                self._discarded += 1
+            self._close(server)
+
+        return self._connect()
+
+    def _checkin(self, server: smtplib.SMTP):
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+
+    def _discard(self, server: smtplib.SMTP):
+        with self._lock:
+            self._discarded += 1
+        self._close(server)
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out an authenticated connection for the duration of the block.
+
+        Connections that fail with a connection-level error are discarded
+        instead of being returned to the pool.
+        """
+        self._slots.acquire()
+        with self._lock:
+            self._in_use += 1
+        server = None
+        try:
+            server = self._checkout()
+            yield server
+        except Exception as e:
+            if server is not None and _is_connection_error(e):
+                self._discard(server)
+                server = None
+            raise
+        finally:
+            if server is not None and server.sock is None:
+                # Closed while in use, e.g. by a streamed message that failed mid-DATA
+                self._discard(server)
+            elif server is not None:
+                self._checkin(server)
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def _send_on(self, server: smtplib.SMTP, from_addr: str, to_addrs: Union[str, Sequence[str]],
+                 message: OutgoingMessage):
+        started = time.perf_counter()
+        try:
+            if isinstance(message, Message):
+                server.send_message(message, from_addr, to_addrs)
+            elif callable(message):
+                sendmail_streamed(server, from_addr, to_addrs, message())
+            else:
+                server.sendmail(from_addr, to_addrs, message)
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._sends += 1
+            self._send_seconds += elapsed
+            self._last_send_seconds = elapsed
+
+    def send(self, from_addr: str, to_addrs: Union[str, Sequence[str]], message: OutgoingMessage):
+        """Send one message, reconnecting once if the pooled session was dropped."""
+        try:
+            with self.connection() as server:
+                self._send_on(server, from_addr, to_addrs, message)
+        except smtplib.SMTPServerDisconnected:
+            logger.info("SMTP connection dropped by server, reconnecting")
+            with self.connection() as server:
+                self._send_on(server, from_addr, to_addrs, message)
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for server, _ in idle:
+            self._close(server)
+
+    def stats(self) -> dict:
+        with self._lock:
+            checkouts = self._created + self._reused
+            return {
+                "max_size": self.max_size,
+                "open": self._in_use + len(self._idle),
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "created": self._created,
+                "reused": self._reused,
+                "discarded": self._discarded,
+                "reuse_ratio": round(self._reused / checkouts, 4) if checkouts else 0.0,
+                "sends": self._sends,
+                "failures": self._failures,
+                "avg_send_ms": round(self._send_seconds / self._sends * 1000, 2) if self._sends else 0.0,
+                "last_send_ms": round(self._last_send_seconds * 1000, 2),
+            }
+
+
+_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Return the process-wide SMTP pool configured from settings."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPConnectionPool(
+                    settings.SMTP_SERVER,
+                    settings.SMTP_PORT,
+                    settings.SMTP_USERNAME,
+                    settings.SMTP_PASSWORD,
+                    max_size=settings.SMTP_POOL_SIZE,
+                    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+                    noop_after=settings.SMTP_POOL_NOOP_AFTER,
+                )
+    return _pool
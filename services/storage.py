@@ -0,0 +1,293 @@
+"""
+Resume storage backends.
+
+Stored files are addressed by key (the value kept in Lead.resume_path) and
+callers never open them directly. LocalStorage keeps files under UPLOAD_DIR.
+S3Storage keeps them in an S3-compatible bucket: AWS S3, MinIO, or a local
+stand-in such as `moto_server` selected through S3_ENDPOINT_URL. It needs the
+optional boto3 package.
+
+Backend methods are blocking; call them through run_in_threadpool (or
+iterate_in_threadpool for iter_range) from async code.
+"""
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredObject:
+    """Metadata of a stored file."""
+    key: str
+    size: int
+    modified: float  # Unix timestamp
+
+
+class StorageBackend:
+    """Interface shared by the storage backends."""
+
+    def staging_dir(self) -> str:
+        """Local directory where uploads are spooled before put_file."""
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """Metadata for `key`, or None if it does not exist."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def put_file(self, key: str, path: str, keep_source: bool = False) -> bool:
+        """
+        Store the local file at `path` under `key`.
+
+        Returns False without writing when `key` already exists; keys are
+        content-addressed, so the stored bytes are the same. The local file
+        is removed afterwards unless `keep_source` is set.
+        """
+        raise NotImplementedError
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """Stream bytes `start` to `end` (inclusive, default: the last byte) of `key`."""
+        raise NotImplementedError
+
+    def read(self, key: str) -> bytes:
+        return b"".join(self.iter_range(key))
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def touch(self, key: str):
+        """Mark `key` as recently used, which protects it from garbage collection."""
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of `key` when the backend is local, for zero-copy serving."""
+        return None
+
+    def uri(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Files under a local directory."""
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.realpath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root or path == self.root:
+            raise ValueError(f"Storage key escapes the upload directory: {key}")
+        return path
+
+    def staging_dir(self) -> str:
+        return self.root
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            result = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key=key, size=result.st_size, modified=result.st_mtime)
+
+    def put_file(self, key: str, path: str, keep_source: bool = False) -> bool:
+        target = self._path(key)
+        if os.path.exists(target):
+            os.utime(target)
+            if not keep_source:
+                os.remove(path)
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not keep_source:
+            os.replace(path, target)
+            return True
+        try:
+            os.link(path, target)
+        except OSError:
+            # Different filesystem or no hard link support
+            temp_target = f"{target}.part"
+            shutil.copyfile(path, temp_target)
+            os.replace(temp_target, target)
+        return True
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        with open(self._path(key), "rb") as file:
+            file.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, key: str):
+        os.utime(self._path(key))
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        for directory, _, files in os.walk(os.path.join(self.root, prefix)):
+            for name in files:
+                # Skip in-progress uploads (.upload-*.part)
+                if name.startswith("."):
+                    continue
+                full_path = os.path.join(directory, name)
+                key = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                result = os.stat(full_path)
+                yield StoredObject(key=key, size=result.st_size, modified=result.st_mtime)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def uri(self, key: str) -> str:
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """Objects in an S3-compatible bucket, under an optional key prefix."""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key_id: Optional[str] = None,
+                 secret_access_key: Optional[str] = None):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("The s3 storage backend requires boto3 (pip install boto3)")
+        if not bucket:
+            raise RuntimeError("S3_BUCKET must be set to use the s3 storage backend")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        # boto3 clients are thread-safe, one is shared by all threadpool workers
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(retries={"max_attempts": 3, "mode": "standard"}),
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _is_missing(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def staging_dir(self) -> str:
+        return tempfile.gettempdir()
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return StoredObject(key=key, size=head["ContentLength"], modified=head["LastModified"].timestamp())
+
+    def put_file(self, key: str, path: str, keep_source: bool = False) -> bool:
+        try:
+            if self.exists(key):
+                self.touch(key)
+                return False
+            # upload_file switches to multipart uploads for large files
+            self.client.upload_file(path, self.bucket, self._key(key))
+            return True
+        finally:
+            if not keep_source and os.path.exists(path):
+                os.remove(path)
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=byte_range)
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def touch(self, key: str):
+        # S3 has no mtime; copying the object onto itself refreshes LastModified
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            CopySource={"Bucket": self.bucket, "Key": self._key(key)},
+            MetadataDirective="REPLACE",
+            Metadata={"touched": str(int(time.time()))},
+        )
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", []):
+                yield StoredObject(
+                    key=item["Key"][len(self.prefix):],
+                    size=item["Size"],
+                    modified=item["LastModified"].timestamp(),
+                )
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def create_storage() -> StorageBackend:
+    """Build the backend selected by STORAGE_BACKEND."""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.UPLOAD_DIR)
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+def get_storage() -> StorageBackend:
+    """Return the process-wide storage backend configured from settings."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+                logger.info(f"Using {settings.STORAGE_BACKEND} resume storage")
+    return _storage
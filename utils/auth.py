@@ -1,21 +1,42 @@
-from datetime import datetime, timedelta
+import time
+import logging
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Cookie
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from utils.database import get_db
-from models import User, UserRole
+from utils.database import get_async_db
+from utils.user_cache import CachedUser, user_cache
+from utils.password_hashing import password_hash_pool
+from utils.token_cache import token_cache, token_digest
+from models import RevokedToken, User, UserRole
 from schemas import TokenData
 from config import settings
 
-# Password hashing utilities
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Password hashing utilities. Pinning min/max rounds to BCRYPT_ROUNDS makes
+# hashes at any other cost "need update", so they are rehashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 # OAuth2 setup for token-based authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# Same, but leaves a missing header to the caller so a cookie can be used instead
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+# Seconds of revoked_tokens read again on each sync
+REVOCATION_SYNC_OVERLAP = 30
 
 def verify_password(plain_password, hashed_password):
     """Verify that the provided password matches the hashed password."""
@@ -25,13 +46,58 @@ def get_password_hash(password):
     """Hash a password for storing."""
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, email: str, password: str):
-    """Authenticate a user by email and password."""
-    user = db.query(User).filter(User.email == email).first()
+async def hash_password(password: str) -> str:
+    """Hash a password on the password hashing pool, off the event loop."""
+    return await password_hash_pool.run(pwd_context.hash, password)
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """Look up a user by email."""
+    return await db.scalar(select(User).where(User.email == email))
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    """
+    Authenticate a user by email and password.
+
+    Verification runs on the password hashing pool. If the stored hash uses a
+    different cost than BCRYPT_ROUNDS it is transparently replaced.
+    """
+    user = await get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await password_hash_pool.run(pwd_context.verify_and_update, password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        user_cache.invalidate(user.email)
+        logger.info(f"Rehashed password for user ID {user.id} with {settings.BCRYPT_ROUNDS} rounds")
+    return user
+
+async def get_user_from_payload(db: AsyncSession, payload: dict) -> Optional[CachedUser]:
+    """
+    Resolve the user a verified token belongs to.
+
+    Uses the token's role claims when AUTH_TRUST_TOKEN_ROLE is set, then the
+    per-worker user cache, and only then the database.
+    """
+    email = payload["sub"]
+    if settings.AUTH_TRUST_TOKEN_ROLE:
+        user = CachedUser.from_claims(payload)
+        if user is not None:
+            user_cache.record_claim_hit()
+            return user
+
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
+    generation = user_cache.generation
+    db_user = await get_user_by_email(db, email)
+    if db_user is None:
+        return None
+    user = CachedUser.from_user(db_user)
+    user_cache.set(email, user, generation)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -45,15 +111,72 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a token and return its payload, raising JWTError if it is invalid.
+
+    Payloads are cached until the token expires, so a token presented again
+    skips the signature check. Revoked tokens are always rejected.
+    """
+    if token_cache.is_revoked(token):
+        raise JWTError("Token has been revoked")
+    payload = token_cache.get(token)
+    if payload is None:
+        started = time.perf_counter()
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_cache.record_decode(time.perf_counter() - started)
+        token_cache.set(token, payload)
+    return payload
+
+async def revoke_access_token(db: AsyncSession, token: str):
+    """Revoke a token for every worker, e.g. on logout."""
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        return
+    expires_at = payload.get("exp")
+    if not isinstance(expires_at, (int, float)):
+        expires_at = time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    now = datetime.utcnow()
+    # Rows are only needed until the token would have expired anyway
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+    await db.merge(RevokedToken(
+        digest=token_digest(token), expires_at=datetime.utcfromtimestamp(expires_at), revoked_at=now
+    ))
+    await db.commit()
+    token_cache.revoke(token, expires_at)
+
+# When this worker last read revoked_tokens, and the revoked_at it read from
+_revocation_sync = {"checked_at": 0.0, "since": None}
+
+async def sync_revocations(db: AsyncSession):
+    """
+    Copy tokens revoked by other workers into this worker's token cache, at
+    most every TOKEN_REVOCATION_SYNC_SECONDS.
+    """
+    now = time.monotonic()
+    if now - _revocation_sync["checked_at"] < settings.TOKEN_REVOCATION_SYNC_SECONDS:
+        return
+    _revocation_sync["checked_at"] = now
+    started = datetime.utcnow()
+    query = select(RevokedToken.digest, RevokedToken.expires_at).where(RevokedToken.expires_at > started)
+    if _revocation_sync["since"] is not None:
+        query = query.where(RevokedToken.revoked_at >= _revocation_sync["since"])
+    for digest, expires_at in (await db.execute(query)).all():
+        token_cache.revoke_digest(digest, expires_at.replace(tzinfo=timezone.utc).timestamp())
+    # Read back a little, so rows committed late by a slow transaction aren't missed
+    _revocation_sync["since"] = started - timedelta(seconds=REVOCATION_SYNC_OVERLAP)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """Get the current authenticated user from the token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    await sync_revocations(db)
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -61,7 +184,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = await get_user_from_payload(db, payload)
     if user is None:
         raise credentials_exception
     return user
@@ -74,9 +197,9 @@ async def get_token_from_cookie(access_token: str = Cookie(None)):
 
 # Alternative user dependency that checks both header and cookie
 async def get_current_user_from_header_or_cookie(
-    token: Optional[str] = Depends(oauth2_scheme),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
     cookie_token: Optional[str] = Cookie(None, alias="access_token"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get the current user from either an auth header or a cookie."""
     # Use header token if provided, otherwise use cookie
@@ -96,8 +219,9 @@ async def get_current_user_from_header_or_cookie(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    await sync_revocations(db)
     try:
-        payload = jwt.decode(effective_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(effective_token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -105,7 +229,7 @@ async def get_current_user_from_header_or_cookie(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = await get_user_from_payload(db, payload)
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,133 @@
+"""
+Optional at-rest zstd compression for stored resumes.
+
+Compressed files carry a ".zst" suffix on their storage key, so readers can
+tell them from files stored as-is. Needs the optional zstandard package.
+"""
+import time
+import logging
+from typing import Iterable, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+ZSTD_SUFFIX = ".zst"
+
+# Leading bytes of formats that are already compressed and gain nothing from zstd
+COMPRESSED_SIGNATURES = (
+    b"PK\x03\x04",  # Zip containers: DOCX, ODT
+    b"\x1f\x8b",  # gzip
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"BZh",  # bzip2
+    b"\xfd7zXZ\x00",  # xz
+    b"7z\xbc\xaf\x27\x1c",  # 7-Zip
+    b"Rar!",
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG",
+)
+
+# Aggregate counters for this worker
+compression_stats = {
+    "compressed": 0,
+    "skipped": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "compress_cpu_seconds": 0.0,
+    "decompressed_bytes": 0,
+    "decompress_cpu_seconds": 0.0,
+}
+
+
+def compression_available() -> bool:
+    return zstandard is not None
+
+
+def is_compressed_key(key: Optional[str]) -> bool:
+    return bool(key) and key.endswith(ZSTD_SUFFIX)
+
+
+def original_key(key: str) -> str:
+    """The key without the compression suffix, for its extension and media type."""
+    return key[:-len(ZSTD_SUFFIX)] if is_compressed_key(key) else key
+
+
+def looks_compressed(head: bytes) -> bool:
+    """Sniff the first bytes of a file for an already-compressed format."""
+    return head.startswith(COMPRESSED_SIGNATURES)
+
+
+class StreamCompressor:
+    """Incremental zstd compression that measures the CPU time it uses."""
+
+    def __init__(self, level: int):
+        if zstandard is None:
+            raise RuntimeError("Resume compression requires zstandard (pip install zstandard)")
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def _run(self, func, *args) -> bytes:
+        # Thread CPU time, since each call runs on one threadpool thread
+        started = time.thread_time()
+        output = func(*args)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_out += len(output)
+        return output
+
+    def compress(self, chunk: bytes) -> bytes:
+        self.bytes_in += len(chunk)
+        return self._run(self._compressor.compress, chunk)
+
+    def flush(self) -> bytes:
+        return self._run(self._compressor.flush)
+
+    def record(self):
+        """Add a finished file to the worker's counters."""
+        compression_stats["compressed"] += 1
+        compression_stats["bytes_in"] += self.bytes_in
+        compression_stats["bytes_out"] += self.bytes_out
+        compression_stats["compress_cpu_seconds"] += self.cpu_seconds
+
+
+def iter_decompressed(chunks: Iterable[bytes], start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Decompress a stream of zstd chunks, yielding only bytes `start` to `end`
+    (inclusive) of the original content.
+    """
+    if zstandard is None:
+        raise RuntimeError("Reading compressed resumes requires zstandard (pip install zstandard)")
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    position = 0
+    for chunk in chunks:
+        started = time.thread_time()
+        data = decompressor.decompress(chunk)
+        compression_stats["decompress_cpu_seconds"] += time.thread_time() - started
+        compression_stats["decompressed_bytes"] += len(data)
+        chunk_start, position = position, position + len(data)
+        if position <= start:
+            continue
+        data = data[max(start - chunk_start, 0):]
+        if end is not None and position > end + 1:
+            data = data[:len(data) - (position - end - 1)]
+        if data:
+            yield data
+        if end is not None and position > end:
+            return
+
+
+def stats() -> dict:
+    bytes_in = compression_stats["bytes_in"]
+    megabytes_in = bytes_in / 1024 / 1024
+    return {
+        **compression_stats,
+        "available": compression_available(),
+        # Stored size as a fraction of the original, for compressed files
+        "ratio": round(compression_stats["bytes_out"] / bytes_in, 3) if bytes_in else None,
+        "compress_cpu_ms_per_mb": round(compression_stats["compress_cpu_seconds"] * 1000 / megabytes_in, 2) if bytes_in else None,
+    }
@@ -1,5 +1,8 @@
 import logging
-from sqlalchemy import create_engine
+from typing import Optional, Sequence
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -11,20 +14,43 @@ logger = logging.getLogger(__name__)
 # Create database engine
 logger.info(f"Creating database engine with URL: {settings.DATABASE_URL}")
 
-# Set up engine with appropriate connect_args
+def _async_database_url(url: str) -> str:
+    """Map a database URL onto its asyncio driver (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite+aiosqlite") or url.startswith("postgresql+asyncpg"):
+        return url
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite" + url[url.index(":"):]
+    if url.startswith("postgres"):
+        return "postgresql+asyncpg" + url[url.index(":"):]
+    raise ValueError("Unsupported database type")
+
+# Set up engines with appropriate connect_args. The sync engine serves scripts,
+# migrations and startup tasks; request handlers use the async engine.
 if settings.DATABASE_URL.startswith('sqlite'):
     # SQLite specific settings
     engine = create_engine(
         settings.DATABASE_URL, 
         connect_args={"check_same_thread": False}  # Needed for SQLite
     )
+    async_engine = create_async_engine(_async_database_url(settings.DATABASE_URL))
+elif settings.DATABASE_URL.startswith('postgres'):
+    # PostgreSQL: verify pooled connections before use
+    engine = create_engine(settings.DATABASE_URL.replace("postgres://", "postgresql://", 1), pool_pre_ping=True)
+    async_engine = create_async_engine(
+        _async_database_url(settings.DATABASE_URL),
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
 else:
     raise ValueError("Unsupported database type")
 
 logger.info("Database engine created successfully")
 
-# Create a session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit, since async sessions can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Create a base class for declarative models
 Base = declarative_base()
@@ -38,4 +64,31 @@ def get_db():
         yield db
     finally:
         logger.debug("Closing database session")
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session for request handlers
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def create_index(conn: Connection, name: str, table: str, columns: Sequence[str], using: Optional[str] = None):
+    """
+    Create an index if it doesn't exist, without blocking writes on PostgreSQL.
+
+    On PostgreSQL the index is built with CREATE INDEX CONCURRENTLY, so `conn`
+    must be in autocommit mode. An invalid index left behind by an interrupted
+    concurrent build is dropped and rebuilt.
+    """
+    column_sql = ", ".join(columns)
+    if conn.dialect.name == "postgresql":
+        invalid = conn.execute(text("""
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """), {"name": name}).first()
+        if invalid:
+            logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        using_sql = f" USING {using}" if using else ""
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{using_sql} ({column_sql})"))
+    else:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column_sql})"))
@@ -0,0 +1,50 @@
+"""
+Normalized email keys for duplicate lead detection.
+
+Addresses are lowercased, and for providers known to deliver variants of an
+address to the same mailbox the variants are folded together: Gmail ignores
+dots and "+tag" suffixes in the local part (and googlemail.com is gmail.com),
+several providers ignore "+tag" suffixes, and Yahoo uses "-keyword"
+disposable addresses.
+"""
+from typing import Optional
+
+# Domains that are aliases of another provider's domain
+DOMAIN_ALIASES = {
+    "googlemail.com": "gmail.com",
+}
+
+# Domains whose local parts ignore dots
+DOTLESS_DOMAINS = {"gmail.com"}
+
+# Domains that deliver "local<separator>anything" to "local"
+SUBADDRESS_SEPARATORS = {
+    "gmail.com": "+",
+    "outlook.com": "+",
+    "hotmail.com": "+",
+    "live.com": "+",
+    "icloud.com": "+",
+    "me.com": "+",
+    "mac.com": "+",
+    "fastmail.com": "+",
+    "protonmail.com": "+",
+    "proton.me": "+",
+    "yahoo.com": "-",
+}
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Return the key under which submissions from the same mailbox are grouped."""
+    if not email:
+        return None
+    email = email.strip().lower()
+    local, at, domain = email.rpartition("@")
+    if not at or not local:
+        return email
+    domain = DOMAIN_ALIASES.get(domain.rstrip("."), domain.rstrip("."))
+    separator = SUBADDRESS_SEPARATORS.get(domain)
+    if separator:
+        local = local.split(separator, 1)[0] or local
+    if domain in DOTLESS_DOMAINS:
+        local = local.replace(".", "") or local
+    return f"{local}@{domain}"
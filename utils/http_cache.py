@@ -0,0 +1,118 @@
+"""
+Helpers for HTTP validators (ETag), conditional and range requests, and
+content negotiation
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+
+def strong_etag(*parts) -> str:
+    """Build a quoted strong ETag from values that change whenever the content does."""
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header matches `etag`.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so a W/
+    prefix on either side is ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date, e.g. for Last-Modified."""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def not_modified(if_none_match: Optional[str], if_modified_since: Optional[str], etag: str,
+                 last_modified: Optional[datetime] = None) -> bool:
+    """
+    True if a GET can be answered with 304 Not Modified.
+
+    If-None-Match takes precedence; If-Modified-Since is only considered
+    without it, at the one second resolution of HTTP dates.
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+
+
+def if_range_matches(if_range: Optional[str], etag: str) -> bool:
+    """
+    True if a Range header may be honoured given the If-Range header.
+
+    If-Range needs a strong match; a date or a stale validator means the
+    whole representation is sent instead.
+    """
+    return not if_range or if_range.strip() == etag
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a `Range: bytes=...` header against a representation of `size` bytes.
+
+    Returns the inclusive (start, end) to send, or None to send everything
+    (no header, a malformed one, or several ranges). Raises ValueError when
+    the range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = (part.strip() for part in spec.partition("-"))
+    if not dash or (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(range_header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError(range_header)
+    return start, min(end, size - 1)
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """True if an Accept-Encoding header explicitly allows `coding` (q > 0)."""
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() != coding:
+            continue
+        params = params.strip().replace(" ", "")
+        if not params.startswith("q="):
+            return True
+        try:
+            return float(params[2:]) > 0
+        except ValueError:
+            return False
+    return False
@@ -0,0 +1,163 @@
+"""
+Count strategies for the lead list: cached exact counts and planner estimates
+"""
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from config import settings
+from models import Lead
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+EXACT = "exact"
+ESTIMATE = "estimate"
+
+
+def lead_filter_key(state=None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                    search: Optional[str] = None) -> str:
+    """Normalize the list filters into a stable cache key."""
+    return json.dumps({
+        "state": state.value if hasattr(state, "value") else state,
+        "start_date": start_date or None,
+        "end_date": end_date or None,
+        "search": search.strip().lower() if search and search.strip() else None,
+    }, sort_keys=True)
+
+
+class LeadCountCache:
+    """
+    Bounded TTL cache of exact counts per filter key.
+
+    Entries are stored with the lead data version they were counted at (see
+    lead_data_version()) and only returned to lookups with the same version,
+    so a write in any worker invalidates them everywhere. Writes in this
+    worker also call invalidate(), which drops every entry. Changes that
+    leave the version alone (resume text extraction, which changes search
+    matches) are picked up once the TTL expires.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (count, stored_at, version)
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so counts computed before a write are not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, version=None) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl or entry[2] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, count: int, generation: int, version=None):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (count, time.monotonic(), version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+lead_count_cache = LeadCountCache(settings.LEAD_COUNT_CACHE_TTL, settings.LEAD_COUNT_CACHE_SIZE)
+
+
+class ExplainJSON(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, compiled with its parameters bound as usual."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(ExplainJSON, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def estimate_count(db: Session, statement) -> Optional[int]:
+    """
+    Return the PostgreSQL planner's row estimate for a select() statement.
+
+    Takes a sync Session (use AsyncSession.run_sync). Returns None on other
+    databases, where callers fall back to an exact count.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    # Compiled through the dialect like any other statement, so bind processing
+    # (enum values, datetimes) applies to the explained query's parameters
+    plan = db.execute(ExplainJSON(statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def lead_data_version(db: AsyncSession) -> Tuple[Optional[datetime], Optional[int]]:
+    """
+    (max(updated_at), max(id)) of the leads table. Every insert or update of a
+    lead moves one of them, in whichever worker it happens.
+    """
+    # Separate subqueries, so each max is a single index lookup on SQLite too
+    return tuple((await db.execute(select(
+        select(func.max(Lead.updated_at)).scalar_subquery(),
+        select(func.max(Lead.id)).scalar_subquery(),
+    ))).one())
+
+
+async def count_leads(db: AsyncSession, statement, key: str, mode: str = EXACT, version=None) -> Tuple[int, bool]:
+    """
+    Count the leads matched by a select() statement using the requested strategy.
+
+    `version` is the lead_data_version() read before the count; cached counts
+    from another version are not reused.
+    Returns (total, is_estimate).
+    """
+    if mode == ESTIMATE:
+        estimate = await db.run_sync(estimate_count, statement)
+        if estimate is not None:
+            return estimate, True
+
+    cached = lead_count_cache.get(key, version)
+    if cached is not None:
+        return cached, False
+
+    generation = lead_count_cache.generation
+    total = await db.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+    lead_count_cache.set(key, total, generation, version)
+    return total, False
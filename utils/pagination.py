@@ -0,0 +1,89 @@
+"""
+Keyset (cursor) pagination helpers for listing leads newest first
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+from models import Lead
+
+NEXT = "next"
+PREV = "prev"
+
+
+def encode_cursor(lead: Lead, direction: str) -> str:
+    """Build an opaque cursor pointing just past `lead` in the given direction."""
+    payload = {"t": lead.created_at.isoformat(), "id": lead.id, "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    """Decode a cursor into (created_at, id, direction)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["t"])
+        lead_id = int(payload["id"])
+        direction = payload["d"]
+        if direction not in (NEXT, PREV):
+            raise ValueError(f"Unknown cursor direction: {direction}")
+        return created_at, lead_id, direction
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {str(e)}"
+        )
+
+
+def apply_cursor(query, cursor: str, limit: int):
+    """
+    Restrict and order a lead query to the page identified by `cursor`.
+
+    Pages are ordered by (created_at, id) descending, which is served by the
+    composite index on those columns. One extra row is fetched so callers can
+    tell whether another page exists. Returns (query, direction).
+    """
+    created_at, lead_id, direction = decode_cursor(cursor)
+    if direction == NEXT:
+        query = query.filter(
+            or_(Lead.created_at < created_at,
+                and_(Lead.created_at == created_at, Lead.id < lead_id))
+        ).order_by(Lead.created_at.desc(), Lead.id.desc())
+    else:
+        # Walk backwards in ascending order, the caller reverses the rows
+        query = query.filter(
+            or_(Lead.created_at > created_at,
+                and_(Lead.created_at == created_at, Lead.id > lead_id))
+        ).order_by(Lead.created_at.asc(), Lead.id.asc())
+    return query.limit(limit + 1), direction
+
+
+def page_cursors(rows: List[Lead], limit: int, direction: Optional[str],
+                 has_previous: bool) -> Tuple[List[Lead], Optional[str], Optional[str]]:
+    """
+    Trim the look-ahead row and compute the cursors around a page.
+
+    `rows` must be in the order they were fetched. `direction` is None for
+    offset pages, whose `has_previous` tells whether earlier rows exist.
+    Returns (leads, next_cursor, prev_cursor).
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if direction == PREV:
+        rows = list(reversed(rows))
+        has_next, has_prev = True, has_more
+    elif direction == NEXT:
+        has_next, has_prev = has_more, True
+    else:
+        has_next, has_prev = has_more, has_previous
+
+    next_cursor = encode_cursor(rows[-1], NEXT) if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0], PREV) if rows and has_prev else None
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,104 @@
+"""
+Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt is deliberately slow (hundreds of milliseconds per call at the default
+cost), so running it on the event loop stalls every other request on the
+worker. The bcrypt library releases the GIL while hashing, so a small thread
+pool runs hashes in parallel without blocking the loop. Work beyond
+PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT is rejected with a 503
+rather than queueing without bound.
+"""
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashPool:
+    """Runs password hashing functions on a dedicated, size-limited thread pool."""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._peak_pending = 0
+
+        # Metrics
+        self.completed = 0
+        self.rejected = 0
+        self._seconds = 0.0
+        self._wait_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run `func(*args)` on the pool, or raise a 503 if the queue is full."""
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                logger.warning(f"Password hash queue full ({self._pending} pending), rejecting request")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-in attempts in progress, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+
+        queued_at = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._wait_seconds += started - queued_at
+                    self._seconds += finished - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), timed)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self._pending,
+                "peak_pending": self._peak_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_hash_ms": round(self._seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_wait_ms": round(self._wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            }
+
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT)
@@ -0,0 +1,263 @@
+"""
+Rate limiting and admission control for the unauthenticated endpoints
+(lead submission and login).
+
+Limits are token buckets: a client may make `burst` requests at once, then
+`per_minute` requests a minute, tracked per client IP and per email.
+RATE_LIMIT_BACKEND selects where buckets live: "memory" keeps them per worker,
+"redis" shares them between workers and servers through REDIS_URL and needs
+the optional redis package; any Redis-compatible server (Redis, Valkey, a
+local redis-server for testing) works. If the shared backend is unreachable,
+requests are let through rather than failing the endpoint.
+
+AdmissionMiddleware applies the per-IP limits and caps in-flight lead
+submissions before the request body is read, so rejected clients never get to
+upload 5 MB or cost a bcrypt verification.
+"""
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+from config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    name: str
+    per_minute: float
+    burst: int
+
+
+# In-flight upload counters for this worker, kept by AdmissionMiddleware
+admission_stats = {
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "rejected_busy": 0,
+}
+
+SUBMIT_PER_IP = "submit_ip"
+SUBMIT_PER_EMAIL = "submit_email"
+LOGIN_PER_IP = "login_ip"
+LOGIN_PER_EMAIL = "login_email"
+
+
+def configured_limits() -> Dict[str, RateLimit]:
+    return {
+        SUBMIT_PER_IP: RateLimit(SUBMIT_PER_IP, settings.SUBMIT_RATE_PER_IP, settings.SUBMIT_BURST_PER_IP),
+        SUBMIT_PER_EMAIL: RateLimit(SUBMIT_PER_EMAIL, settings.SUBMIT_RATE_PER_EMAIL, settings.SUBMIT_BURST_PER_EMAIL),
+        LOGIN_PER_IP: RateLimit(LOGIN_PER_IP, settings.LOGIN_RATE_PER_IP, settings.LOGIN_BURST_PER_IP),
+        LOGIN_PER_EMAIL: RateLimit(LOGIN_PER_EMAIL, settings.LOGIN_RATE_PER_EMAIL, settings.LOGIN_BURST_PER_EMAIL),
+    }
+
+
+class MemoryBackend:
+    """Token buckets in this worker's memory, least recently used evicted beyond `max_keys`."""
+
+    name = "memory"
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token. Returns 0 if one was available, else seconds until one will be."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+# Same algorithm as MemoryBackend.take, run atomically on the Redis server with
+# its clock, so every worker sees one bucket per key
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Token buckets shared through Redis, one hash per key that expires once full again."""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("The redis rate limit backend requires redis (pip install redis)")
+        self.prefix = prefix
+        self.client = redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        return float(await self._take(keys=[f"{self.prefix}{key}"], args=[rate, burst]))
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class RateLimiter:
+    """Applies the configured limits on a backend and keeps per-limit counters."""
+
+    def __init__(self, backend, limits: Dict[str, RateLimit]):
+        self.backend = backend
+        self.limits = limits
+        self.allowed = {name: 0 for name in limits}
+        self.limited = {name: 0 for name in limits}
+        self.errors = 0
+
+    async def retry_after(self, limit_name: str, key: str) -> float:
+        """Take a token for `key`. Returns 0 if allowed, else seconds the client should wait."""
+        limit = self.limits[limit_name]
+        if not settings.RATE_LIMIT_ENABLED or limit.per_minute <= 0:
+            return 0.0
+        try:
+            wait = await self.backend.take(f"{limit_name}:{key}", limit.per_minute / 60, limit.burst)
+        except Exception as e:
+            # Fail open: an unreachable shared backend shouldn't take the endpoints down
+            self.errors += 1
+            logger.warning(f"Rate limit backend error, allowing request: {str(e)}")
+            return 0.0
+        if wait > 0:
+            self.limited[limit_name] += 1
+        else:
+            self.allowed[limit_name] += 1
+        return wait
+
+    async def enforce(self, limit_name: str, key: str):
+        """Take a token for `key`, or raise a 429 with Retry-After."""
+        wait = await self.retry_after(limit_name, key)
+        if wait > 0:
+            logger.warning(f"Rate limit {limit_name} exceeded for {key}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "enabled": settings.RATE_LIMIT_ENABLED,
+            "keys": self.backend.size(),
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+            "errors": self.errors,
+            "uploads": {**admission_stats, "max_in_flight": settings.MAX_INFLIGHT_UPLOADS},
+        }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter on the backend selected by RATE_LIMIT_BACKEND."""
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        backend = MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+    elif settings.RATE_LIMIT_BACKEND == "redis":
+        backend = RedisBackend(settings.REDIS_URL)
+    else:
+        raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+    return RateLimiter(backend, configured_limits())
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter configured from settings."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = create_rate_limiter()
+        logger.info(f"Using {settings.RATE_LIMIT_BACKEND} rate limit backend")
+    return _rate_limiter
+
+
+def client_ip(scope) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that answers before the request body is read: POSTs to
+    `ip_limits` paths are rate limited per client IP (429), and at most
+    `max_in_flight` requests to `upload_paths` run at once per worker (503).
+    """
+
+    def __init__(self, app, ip_limits: Dict[str, str], upload_paths: Iterable[str], max_in_flight: int):
+        self.app = app
+        self.ip_limits = ip_limits
+        self.upload_paths = set(upload_paths)
+        self.max_in_flight = max_in_flight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.ip_limits:
+            await self.app(scope, receive, send)
+            return
+
+        capped = scope["path"] in self.upload_paths and self.max_in_flight > 0
+        if capped:
+            # Reserve the slot before awaiting the limiter, so the check stays atomic
+            if admission_stats["in_flight"] >= self.max_in_flight:
+                admission_stats["rejected_busy"] += 1
+                logger.warning(f"{admission_stats['in_flight']} uploads in flight, rejecting request")
+                await self._reject(status.HTTP_503_SERVICE_UNAVAILABLE,
+                                   "Too many submissions in progress, please retry shortly", 1)(scope, receive, send)
+                return
+            admission_stats["in_flight"] += 1
+            admission_stats["peak_in_flight"] = max(admission_stats["peak_in_flight"], admission_stats["in_flight"])
+        try:
+            wait = await get_rate_limiter().retry_after(self.ip_limits[scope["path"]], client_ip(scope))
+            if wait > 0:
+                logger.warning(f"Rate limit {self.ip_limits[scope['path']]} exceeded for {client_ip(scope)}")
+                await self._reject(status.HTTP_429_TOO_MANY_REQUESTS,
+                                   "Too many requests, please retry later", wait)(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+        finally:
+            if capped:
+                admission_stats["in_flight"] -= 1
+
+    def _reject(self, status_code: int, detail: str, retry_after: float) -> JSONResponse:
+        return JSONResponse(
+            status_code=status_code,
+            content={"detail": detail},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
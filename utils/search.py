@@ -0,0 +1,267 @@
+"""
+Indexed full-text search over lead names, emails and extracted resume text.
+
+SQLite uses an FTS5 virtual table for ranked word-prefix matching plus a
+second one with the trigram tokenizer for substring matches on names and
+emails, both kept in sync with the leads table by triggers. PostgreSQL uses a
+GIN index on a tsvector expression for ranked prefix matching plus pg_trgm
+GIN indexes, which keep substring (ILIKE) matches index-backed. Other
+databases fall back to plain ILIKE scans.
+"""
+import re
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, Integer, MetaData, Table, func, literal_column, or_, select, text, union
+from sqlalchemy.engine import Connection, Engine
+
+from models import Lead
+from utils.database import create_index
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Lightweight handle on the FTS5 table. It lives in its own MetaData so that
+# Base.metadata.create_all never tries to create it as a regular table.
+leads_fts = Table("leads_fts", MetaData(), Column("rowid", Integer, primary_key=True))
+leads_trigram = Table("leads_trigram", MetaData(), Column("rowid", Integer, primary_key=True))
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5(
+        first_name, last_name, email, resume_text,
+        content='leads', content_rowid='id',
+        tokenize='unicode61', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS leads_fts_ai AFTER INSERT ON leads BEGIN
+        INSERT INTO leads_fts(rowid, first_name, last_name, email, resume_text)
+        VALUES (new.id, new.first_name, new.last_name, new.email, new.resume_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS leads_fts_ad AFTER DELETE ON leads BEGIN
+        INSERT INTO leads_fts(leads_fts, rowid, first_name, last_name, email, resume_text)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.resume_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS leads_fts_au AFTER UPDATE OF first_name, last_name, email, resume_text ON leads BEGIN
+        INSERT INTO leads_fts(leads_fts, rowid, first_name, last_name, email, resume_text)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.resume_text);
+        INSERT INTO leads_fts(rowid, first_name, last_name, email, resume_text)
+        VALUES (new.id, new.first_name, new.last_name, new.email, new.resume_text);
+    END
+    """,
+]
+
+# Substring index over names and emails
+SQLITE_SUBSTRING_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS leads_trigram USING fts5(
+        first_name, last_name, email,
+        content='leads', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS leads_trigram_ai AFTER INSERT ON leads BEGIN
+        INSERT INTO leads_trigram(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS leads_trigram_ad AFTER DELETE ON leads BEGIN
+        INSERT INTO leads_trigram(leads_trigram, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS leads_trigram_au AFTER UPDATE OF first_name, last_name, email ON leads BEGIN
+        INSERT INTO leads_trigram(leads_trigram, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO leads_trigram(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+]
+
+# The trigram tokenizer can't match anything shorter, and needs SQLite 3.34
+TRIGRAM_MIN_LENGTH = 3
+TRIGRAM_MIN_SQLITE = (3, 34)
+
+# Dropped when upgrading an FTS5 table created before resume_text was indexed
+SQLITE_OBSOLETE_SEARCH_DDL = [
+    "DROP TRIGGER IF EXISTS leads_fts_ai",
+    "DROP TRIGGER IF EXISTS leads_fts_ad",
+    "DROP TRIGGER IF EXISTS leads_fts_au",
+    "DROP TABLE IF EXISTS leads_fts",
+]
+
+# The tsvector expression must match the index definition exactly for the planner to use it
+POSTGRES_TSVECTOR_SQL = (
+    "to_tsvector('simple'::regconfig, coalesce(first_name, '') || ' ' || "
+    "coalesce(last_name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(resume_text, ''))"
+)
+
+# (name, indexed expression) pairs, all GIN indexes on the leads table
+POSTGRES_SEARCH_INDEXES = [
+    ("ix_leads_search_document_tsv", f"({POSTGRES_TSVECTOR_SQL})"),
+    ("ix_leads_first_name_trgm", "first_name gin_trgm_ops"),
+    ("ix_leads_last_name_trgm", "last_name gin_trgm_ops"),
+    ("ix_leads_email_trgm", "email gin_trgm_ops"),
+]
+
+# Indexes on earlier versions of the tsvector expression
+POSTGRES_OBSOLETE_SEARCH_INDEXES = ["ix_leads_search_tsv"]
+
+# Per process: whether the FTS5 tables exist in the SQLite database
+_fts_available: Optional[bool] = None
+_trigram_available: Optional[bool] = None
+
+
+def _create_substring_index(conn: Connection) -> bool:
+    version = conn.execute(text("SELECT sqlite_version()")).scalar()
+    if tuple(int(part) for part in version.split(".")[:2]) < TRIGRAM_MIN_SQLITE:
+        logger.warning(f"SQLite {version} has no trigram tokenizer, searches only match word prefixes")
+        return False
+    exists = bool(list(conn.execute(text("PRAGMA table_info(leads_trigram)"))))
+    for statement in SQLITE_SUBSTRING_DDL:
+        conn.execute(text(statement))
+    if not exists:
+        conn.execute(text("INSERT INTO leads_trigram(leads_trigram) VALUES ('rebuild')"))
+        logger.info("Created FTS5 trigram index for lead substring search")
+    return True
+
+
+def create_search_index(conn: Connection):
+    """
+    Create the search index for the connection's database if it doesn't exist yet.
+
+    On PostgreSQL the indexes are built concurrently, so `conn` must be in
+    autocommit mode.
+    """
+    global _fts_available, _trigram_available
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(leads_fts)"))]
+        exists = bool(columns)
+        if exists and "resume_text" not in columns:
+            # FTS5 tables can't gain columns, so rebuild the index with resume_text
+            for statement in SQLITE_OBSOLETE_SEARCH_DDL:
+                conn.execute(text(statement))
+            exists = False
+        for statement in SQLITE_SEARCH_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            # Index the rows that were inserted before the triggers existed
+            conn.execute(text("INSERT INTO leads_fts(leads_fts) VALUES ('rebuild')"))
+            logger.info("Created FTS5 search index for leads")
+        _fts_available = True
+        _trigram_available = _create_substring_index(conn)
+    elif dialect == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for name, expression in POSTGRES_SEARCH_INDEXES:
+            create_index(conn, name, "leads", [expression], using="GIN")
+        for name in POSTGRES_OBSOLETE_SEARCH_INDEXES:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        logger.info("Verified tsvector and trigram search indexes for leads")
+    else:
+        logger.info(f"No search index support for {dialect}, searches will scan")
+
+
+def ensure_search_index(engine: Engine):
+    """Create the search index outside of the migration runner (e.g. for benchmarks)."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            create_search_index(conn.execution_options(isolation_level="AUTOCOMMIT"))
+    else:
+        with engine.begin() as conn:
+            create_search_index(conn)
+
+
+def search_tokens(search: str) -> List[str]:
+    """Split a search string into lowercase word tokens."""
+    return re.findall(r"\w+", search.lower())
+
+
+def detect_search_index(engine: Engine):
+    """Record whether the database has the FTS5 tables, for workers that didn't create them."""
+    global _fts_available, _trigram_available
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            tables = set(conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('leads_fts', 'leads_trigram')"
+            )).scalars())
+        _fts_available = "leads_fts" in tables
+        _trigram_available = "leads_trigram" in tables
+
+
+def _ilike_search(query, search: str):
+    search_term = f"%{search}%"
+    return query.filter(
+        or_(
+            Lead.first_name.ilike(search_term),
+            Lead.last_name.ilike(search_term),
+            Lead.email.ilike(search_term),
+            Lead.resume_text.ilike(search_term)
+        )
+    )
+
+
+def _substring_terms(search: str):
+    """Substring matches on names and emails, ORed with the word-prefix index match."""
+    search_term = f"%{search}%"
+    return [
+        Lead.first_name.ilike(search_term),
+        Lead.last_name.ilike(search_term),
+        Lead.email.ilike(search_term),
+    ]
+
+
+def apply_search(query, dialect: str, search: str, ranked: bool = True) -> Tuple[object, Optional[object]]:
+    """
+    Restrict a lead query to leads matching `search`.
+
+    A lead matches when every word in the search matches the start of a word
+    in its first name, last name, email or resume text, or when the whole
+    search is a substring of its first name, last name or email (so "smith"
+    finds "Goldsmith" and "example" finds "jane@example.com"). Returns
+    (query, rank) where rank is an expression to order by for best matches
+    first (None if unavailable, or if not `ranked`: on SQLite ranking costs
+    a join, so callers that order by something else should skip it).
+    Works on both ORM queries and select() statements.
+
+    On SQLite substrings are matched through the trigram index, which needs at
+    least three characters; shorter searches only match word prefixes.
+    """
+    tokens = search_tokens(search)
+
+    if tokens and dialect == "sqlite" and _fts_available:
+        match = " AND ".join(f'"{token}"*' for token in tokens)
+        fts_match = literal_column("leads_fts").match(match)
+        matching_ids = select(leads_fts.c.rowid).where(fts_match)
+        substring = search.strip()
+        if _trigram_available and len(substring) >= TRIGRAM_MIN_LENGTH:
+            phrase = '"' + substring.replace('"', '""') + '"'
+            matching_ids = union(matching_ids, select(leads_trigram.c.rowid).where(
+                literal_column("leads_trigram").match(phrase)
+            ))
+        # Both branches are index lookups, so only matching leads are visited
+        query = query.filter(Lead.id.in_(matching_ids))
+        if not ranked:
+            return query, None
+        ranks = select(leads_fts.c.rowid, literal_column("rank").label("rank")).where(fts_match).subquery("fts_ranks")
+        query = query.outerjoin(ranks, ranks.c.rowid == Lead.id)
+        # FTS5's bm25 rank is negative and lower is better, so substring-only matches come last
+        return query, func.coalesce(ranks.c.rank, 0).asc()
+
+    if tokens and dialect == "postgresql":
+        tsvector = literal_column(POSTGRES_TSVECTOR_SQL)
+        tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{token}:*" for token in tokens))
+        # The ILIKE branches keep substring matches working and use the trigram indexes
+        query = query.filter(or_(tsvector.op("@@")(tsquery), *_substring_terms(search)))
+        return query, func.ts_rank(tsvector, tsquery).desc()
+
+    return _ilike_search(query, search), None
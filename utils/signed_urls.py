@@ -0,0 +1,32 @@
+"""
+Signed, expiring resume download links for notification emails.
+
+The signature is an HMAC of the lead id, its stored resume key and the expiry,
+keyed with SECRET_KEY, so a link stops working when it expires or when the
+lead's resume is replaced.
+"""
+import hmac
+import time
+import hashlib
+from typing import Optional
+from urllib.parse import urlencode
+
+from config import settings
+
+
+def _resume_signature(lead_id: int, resume_path: str, expires: int) -> str:
+    message = f"resume:{lead_id}:{resume_path}:{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def signed_resume_url(lead_id: int, resume_path: str, ttl: Optional[int] = None) -> str:
+    """Absolute URL that downloads the lead's resume without logging in until it expires."""
+    expires = int(time.time()) + (settings.RESUME_LINK_TTL if ttl is None else ttl)
+    query = urlencode({"expires": expires, "signature": _resume_signature(lead_id, resume_path, expires)})
+    return f"{settings.APP_BASE_URL.rstrip('/')}/api/leads/{lead_id}/resume/signed?{query}"
+
+
+def verify_resume_signature(lead_id: int, resume_path: str, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_resume_signature(lead_id, resume_path, expires), signature)
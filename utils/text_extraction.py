@@ -0,0 +1,78 @@
+"""
+Plain-text extraction from resume files (PDF, DOCX, TXT).
+
+Runs in worker processes, so it only depends on the standard library and,
+for PDFs, the optional pypdf package.
+"""
+import io
+import re
+import zipfile
+from typing import Optional, Tuple
+from xml.etree import ElementTree
+
+_WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Uncompressed size limit for the DOCX document part, against zip bombs
+MAX_DOCX_XML_BYTES = 50 * 1024 * 1024
+
+
+class ExtractorUnavailable(RuntimeError):
+    """The package needed for a format is not installed; retry once it is."""
+
+
+def _pdf_text(data: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ExtractorUnavailable("PDF text extraction requires pypdf (pip install pypdf)")
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _docx_text(data: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        info = archive.getinfo("word/document.xml")
+        if info.file_size > MAX_DOCX_XML_BYTES:
+            raise ValueError(f"DOCX document part is too large ({info.file_size} bytes)")
+        root = ElementTree.fromstring(archive.read(info))
+    return "\n".join(
+        "".join(node.text or "" for node in paragraph.iter(f"{_WORD_NAMESPACE}t"))
+        for paragraph in root.iter(f"{_WORD_NAMESPACE}p")
+    )
+
+
+def _txt_text(data: bytes) -> str:
+    return data.decode("utf-8-sig", errors="replace")
+
+
+EXTRACTORS = {
+    ".pdf": _pdf_text,
+    ".docx": _docx_text,
+    ".txt": _txt_text,
+}
+
+
+def extract_text(data: bytes, extension: str, max_chars: int) -> str:
+    """
+    Extract searchable text from a resume, with whitespace collapsed and
+    truncated to `max_chars`. Returns "" for unsupported formats.
+    """
+    extractor = EXTRACTORS.get(extension.lower())
+    if extractor is None:
+        return ""
+    # PostgreSQL text columns can't hold NUL characters
+    text = extractor(data).replace("\x00", " ")
+    return re.sub(r"\s+", " ", text).strip()[:max_chars]
+
+
+def extract_text_or_error(data: bytes, extension: str, max_chars: int) -> Tuple[str, Optional[str]]:
+    """
+    extract_text for worker processes: returns (text, error) instead of raising
+    on unreadable files, so callers can tell them apart from pool failures.
+    """
+    try:
+        return extract_text(data, extension, max_chars), None
+    except ExtractorUnavailable:
+        raise
+    except Exception as e:
+        return "", f"{type(e).__name__}: {str(e)}"
@@ -0,0 +1,124 @@
+"""
+Per-worker cache of verified JWT payloads, keyed by a digest of the token
+"""
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def token_digest(token: str) -> str:
+    """Key tokens by digest so raw bearer tokens are never held as cache keys."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of payloads whose signature has already been verified.
+
+    Entries are only served until the token's `exp` claim. Revoked tokens are
+    remembered until they would have expired anyway, and are rejected even if
+    they were never cached. The revoked set mirrors the revoked_tokens table
+    shared by all workers (see utils.auth.sync_revocations).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # digest -> (payload, expires_at)
+        self._revoked = {}  # digest -> expires_at
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self._decodes = 0
+        self._decode_seconds = 0.0
+
+    def get(self, token: str) -> Optional[dict]:
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token: str, payload: dict):
+        expires_at = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        digest = token_digest(token)
+        with self._lock:
+            if digest in self._revoked:
+                return
+            self._entries[digest] = (payload, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_decode(self, seconds: float):
+        with self._lock:
+            self._decodes += 1
+            self._decode_seconds += seconds
+
+    def revoke(self, token: str, expires_at: Optional[float] = None):
+        """Reject a token in this worker from now on, e.g. on logout."""
+        digest = token_digest(token)
+        if expires_at is None:
+            with self._lock:
+                entry = self._entries.get(digest)
+            expires_at = entry[1] if entry else time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        self.revoke_digest(digest, expires_at)
+
+    def revoke_digest(self, digest: str, expires_at: float):
+        """Reject the token with this digest until `expires_at`."""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            # Forget revocations of tokens that have expired on their own
+            for revoked, revoked_until in list(self._revoked.items()):
+                if revoked_until <= now:
+                    del self._revoked[revoked]
+            if expires_at > now:
+                self._revoked[digest] = expires_at
+
+    def is_revoked(self, token: str) -> bool:
+        digest = token_digest(token)
+        with self._lock:
+            expires_at = self._revoked.get(digest)
+            return expires_at is not None and expires_at > time.time()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            avg_decode = self._decode_seconds / self._decodes if self._decodes else 0.0
+            saved = self.hits * avg_decode
+            return {
+                "entries": len(self._entries),
+                "revoked": len(self._revoked),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+                "avg_decode_us": round(avg_decode * 1_000_000, 1),
+                "decode_ms_saved": round(saved * 1000, 2),
+                "saved_per_request_us": round(saved / requests * 1_000_000, 1) if requests else 0.0,
+            }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
@@ -0,0 +1,206 @@
+"""
+Streaming upload helpers for spooling uploaded files to disk in fixed-size
+chunks and handing them to the storage backend
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from services.storage import StorageBackend, get_storage
+from utils.compression import ZSTD_SUFFIX, StreamCompressor, compression_stats, is_compressed_key, looks_compressed
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Aggregate counters for all uploads handled by this worker
+upload_stats = {
+    "uploads": 0,
+    "aborted": 0,
+    "bytes": 0,
+    "seconds": 0.0,
+    # Largest single read, not process memory: Starlette spools the request body first
+    "max_chunk_bytes": 0,
+    "deduplicated": 0,
+    "bytes_deduplicated": 0,
+}
+
+
+@dataclass
+class UploadResult:
+    """Outcome of a streamed upload."""
+    filename: str
+    path: str
+    size: int
+    duration: float
+    max_chunk_bytes: int
+    sha256: str = ""
+    # True when identical content was already stored and no new file was written
+    deduplicated: bool = False
+    # Bytes written to storage, smaller than `size` when compressed
+    stored_size: int = 0
+    compressed: bool = False
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / self.duration if self.duration > 0 else float(self.size)
+
+
+def _open_temp_file(directory: str):
+    """Create a temp file in the storage backend's staging directory."""
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=directory)
+    return os.fdopen(fd, "wb"), temp_path
+
+
+def _finalize(buffer, temp_path: str, storage: StorageBackend, key: str) -> bool:
+    """
+    Flush the temp file to disk and hand it to the storage backend.
+
+    Returns False, dropping the temp file instead, when `key` is already
+    stored. Only content-addressed keys can collide, and then the stored file
+    already holds the same bytes.
+    """
+    buffer.flush()
+    os.fsync(buffer.fileno())
+    buffer.close()
+    return storage.put_file(key, temp_path)
+
+
+def _write_chunk(buffer, compressor: Optional[StreamCompressor], chunk: bytes):
+    if compressor is not None:
+        chunk = compressor.compress(chunk)
+    buffer.write(chunk)
+
+
+def _discard(buffer, temp_path: str):
+    """Close and remove a partially written temp file."""
+    try:
+        buffer.close()
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+async def save_upload(upload: UploadFile, filename: Union[str, Callable[[str], str]],
+                      storage: Optional[StorageBackend] = None, max_size: Optional[int] = None, chunk_size: Optional[int] = None,
+                      compress_level: Optional[int] = None) -> UploadResult:
+    """
+    Stream an uploaded file into `storage` under the key `filename`.
+
+    The file is copied in fixed-size chunks into a temp file, with all disk I/O
+    run in the threadpool, and hashed (SHA-256) on the way. The size limit is
+    checked chunk by chunk while copying; Starlette has already spooled the
+    whole request body by then, so it bounds what is stored, not what is
+    received. The temp file is handed to the storage
+    backend only once the upload completes. `filename` may be a function of the
+    hex digest, for content-addressed names that may include subdirectories.
+
+    With `compress_level`, the file is zstd-compressed as it streams and
+    stored under `filename` plus ".zst", unless its first bytes show an
+    already-compressed format. The size limit and digest apply to the
+    original bytes. A content-addressed upload whose content is already
+    stored with or without ".zst" is deduplicated onto that file either way.
+    """
+    storage = storage or get_storage()
+    max_size = max_size or settings.MAX_UPLOAD_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    buffer, temp_path = await run_in_threadpool(_open_temp_file, storage.staging_dir())
+    digest = hashlib.sha256()
+    compressor = None
+    size = 0
+    max_chunk = 0
+    started = time.perf_counter()
+
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            max_chunk = max(max_chunk, len(chunk))
+
+            if size > max_size:
+                logger.warning(f"File size exceeds limit: more than {max_size/1024/1024:.2f}MB received")
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File size exceeds the limit of {max_size/1024/1024:.2f}MB"
+                )
+
+            if size == len(chunk) and compress_level is not None:
+                if looks_compressed(chunk):
+                    compression_stats["skipped"] += 1
+                else:
+                    compressor = StreamCompressor(compress_level)
+
+            digest.update(chunk)
+            await run_in_threadpool(_write_chunk, buffer, compressor, chunk)
+
+        if size == 0:
+            logger.warning("Resume file is empty")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Resume file cannot be empty"
+            )
+
+        if compressor is not None:
+            await run_in_threadpool(buffer.write, compressor.flush())
+
+        sha256 = digest.hexdigest()
+        if callable(filename):
+            filename = filename(sha256)
+            # The same content may be stored already with the other compression
+            # setting (RESUME_COMPRESSION was toggled); reuse that file
+            alternate = filename if compressor is not None else filename + ZSTD_SUFFIX
+            if await run_in_threadpool(storage.exists, alternate):
+                filename = alternate
+            elif compressor is not None:
+                filename += ZSTD_SUFFIX
+        elif compressor is not None:
+            filename += ZSTD_SUFFIX
+        created = await run_in_threadpool(_finalize, buffer, temp_path, storage, filename)
+    except BaseException:
+        # Covers validation errors, disk errors and cancelled (aborted) requests.
+        # Cleanup runs inline since awaiting is not possible once cancelled.
+        upload_stats["aborted"] += 1
+        _discard(buffer, temp_path)
+        raise
+
+    duration = time.perf_counter() - started
+    result = UploadResult(
+        filename=filename,
+        path=storage.uri(filename),
+        size=size,
+        duration=duration,
+        max_chunk_bytes=max_chunk,
+        sha256=sha256,
+        deduplicated=not created,
+        stored_size=compressor.bytes_out if compressor is not None else size,
+        compressed=is_compressed_key(filename),
+    )
+
+    if compressor is not None:
+        compressor.record()
+    upload_stats["uploads"] += 1
+    if not created:
+        upload_stats["deduplicated"] += 1
+        upload_stats["bytes_deduplicated"] += size
+    upload_stats["bytes"] += size
+    upload_stats["seconds"] += duration
+    upload_stats["max_chunk_bytes"] = max(upload_stats["max_chunk_bytes"], max_chunk)
+
+    logger.info(
+        f"Upload {'deduplicated' if not created else 'stored'}: {result.path} | {size/1024:.2f} KB in {duration*1000:.1f} ms "
+        f"({result.bytes_per_second/1024/1024:.2f} MB/s, largest chunk {max_chunk/1024:.0f} KB"
+        f"{f', compressed to {result.stored_size/1024:.2f} KB' if compressor is not None else ''})"
+    )
+    return result
@@ -0,0 +1,128 @@
+"""
+Per-worker cache of authenticated users' identity and role
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from config import settings
+from models import User, UserRole
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Detached snapshot of the User fields the auth dependencies hand to routes.
+
+    Carries the same attribute names as the User model so route code and
+    response schemas can use either interchangeably.
+    """
+    id: int
+    email: str
+    full_name: str
+    role: Optional[UserRole]
+    is_attorney: int
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            is_attorney=user.is_attorney,
+            created_at=user.created_at,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["CachedUser"]:
+        """Build a user from the uid/role claims of a token, or None if they are missing."""
+        try:
+            role = UserRole(payload["role"])
+            return cls(
+                id=int(payload["uid"]),
+                email=payload["sub"],
+                full_name=payload.get("name", ""),
+                role=role,
+                is_attorney=1 if role == UserRole.ATTORNEY else 0,
+            )
+        except (KeyError, ValueError, TypeError):
+            return None
+
+
+class UserCache:
+    """
+    Bounded TTL/LRU cache of users keyed by token subject (email).
+
+    Changes made through this worker call invalidate(). Changes made by other
+    workers or scripts (e.g. create_attorney.py) are picked up once the TTL
+    expires.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # subject -> (CachedUser, stored_at)
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so lookups that raced a change are not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.claim_hits = 0
+
+    def get(self, subject: str) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, subject: str, user: CachedUser, generation: int):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[subject] = (user, time.monotonic())
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_claim_hit(self):
+        with self._lock:
+            self.claim_hits += 1
+
+    def invalidate(self, subject: Optional[str] = None):
+        """Drop one user, or every user when no subject is given."""
+        with self._lock:
+            self.generation += 1
+            if subject is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(subject, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.claim_hits
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "token_claim_hits": self.claim_hits,
+                "hit_rate": round((self.hits + self.claim_hits) / lookups, 4) if lookups else 0.0,
+                "trust_token_role": settings.AUTH_TRUST_TOKEN_ROLE,
+            }
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_TTL, settings.AUTH_USER_CACHE_SIZE)